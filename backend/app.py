@@ -17,16 +17,47 @@ import threading
 import hashlib
 import zipfile
 import io
-from datetime import datetime
+import time
+import queue
+import codecs
+import atexit
+import heapq
+import itertools
+import socket
+import select
+import signal
+import struct
+import ctypes
+import ctypes.util
+import pickle
+import fcntl
+import urllib.request
+import urllib.error
+import http.client
+import uuid
+import resource
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, Dict, List
-from dataclasses import dataclass
+from typing import Optional, Dict, List, Callable, Any
+from dataclasses import dataclass, asdict
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import contextmanager
 from functools import wraps
 
-from flask import Flask, jsonify, request, send_file, send_from_directory
+from flask import Flask, Response, jsonify, request, send_file, send_from_directory
 from flask_cors import CORS
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.job import Job
+from apscheduler.jobstores.base import BaseJobStore, ConflictingIdError, JobLookupError
+from apscheduler.util import datetime_to_utc_timestamp
+from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED
+from apscheduler.executors.pool import BasePoolExecutor
+from apscheduler.triggers.base import BaseTrigger
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 
@@ -40,6 +71,44 @@ HOST = os.environ.get('HOST', '0.0.0.0')
 PORT = int(os.environ.get('PORT', '5000'))
 AUTH_USER = os.environ.get('AUTH_USER', '')
 AUTH_PASS = os.environ.get('AUTH_PASS', '')
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '8'))
+DB_CACHE_KB = int(os.environ.get('DB_CACHE_KB', '8192'))
+DB_BUSY_TIMEOUT_MS = int(os.environ.get('DB_BUSY_TIMEOUT_MS', '5000'))
+DB_JOURNAL_MODE = os.environ.get('DB_JOURNAL_MODE', 'WAL').upper()  # WAL needs local storage, DELETE works on network shares
+SSE_KEEPALIVE = int(os.environ.get('SSE_KEEPALIVE', '15'))
+LOGS_PATH = os.environ.get('LOGS_PATH', '')  # Default: <db dir>/logs
+RUN_OUTPUT_LIMIT = 50000  # Bytes of stdout/stderr kept per run in the database
+# Resource usage recorded per run: runs column, struct rusage field, SQL type
+RUSAGE_COLUMNS = [
+    ('cpu_user_seconds', 'ru_utime', 'REAL'),
+    ('cpu_system_seconds', 'ru_stime', 'REAL'),
+    ('max_rss_kb', 'ru_maxrss', 'INTEGER'),
+    ('io_read_blocks', 'ru_inblock', 'INTEGER'),
+    ('io_write_blocks', 'ru_oublock', 'INTEGER'),
+    ('voluntary_ctx_switches', 'ru_nvcsw', 'INTEGER'),
+    ('involuntary_ctx_switches', 'ru_nivcsw', 'INTEGER'),
+]
+EXEC_MODE = os.environ.get('EXEC_MODE', 'popen')  # popen | warm
+CONFIG_WATCH = os.environ.get('CONFIG_WATCH', 'auto')  # auto | inotify | poll | off
+CONFIG_WATCH_DEBOUNCE = float(os.environ.get('CONFIG_WATCH_DEBOUNCE', '0.3'))
+SCHEDULE_SPREAD = int(os.environ.get('SCHEDULE_SPREAD', '0'))  # Default spread window for cron tasks (s)
+SCHEDULER_WORKERS = int(os.environ.get('SCHEDULER_WORKERS', '10'))  # Threads dispatching due jobs to the runner
+RUN_RETENTION_DAYS = int(os.environ.get('RUN_RETENTION_DAYS', '0'))  # 0 = keep runs forever
+RUN_RETENTION_PER_TASK = int(os.environ.get('RUN_RETENTION_PER_TASK', '0'))  # Newest runs kept per task, 0 = all
+RUN_RETENTION_MB = int(os.environ.get('RUN_RETENTION_MB', '0'))  # Database size that triggers pruning, 0 = none
+RETENTION_INTERVAL = float(os.environ.get('RETENTION_INTERVAL', '3600'))
+RETENTION_BATCH = int(os.environ.get('RETENTION_BATCH', '500'))  # Runs deleted per transaction
+LEADER_LOCK = os.environ.get('LEADER_LOCK', '')  # Default: <db dir>/scheduler.lock
+LEADER_POLL_INTERVAL = float(os.environ.get('LEADER_POLL_INTERVAL', '5'))
+LEADER_TIMEOUT = float(os.environ.get('LEADER_TIMEOUT', '30'))
+RUN_BROKER = os.environ.get('RUN_BROKER', '')  # '' = run in-process | database | local
+AGENT_POLL_INTERVAL = float(os.environ.get('AGENT_POLL_INTERVAL', '1'))
+AGENT_HEARTBEAT = float(os.environ.get('AGENT_HEARTBEAT', '10'))
+AGENT_TIMEOUT = float(os.environ.get('AGENT_TIMEOUT', '60'))  # Claimed runs without a heartbeat are failed
+MAX_CONCURRENT_RUNS = int(os.environ.get('MAX_CONCURRENT_RUNS', str(os.cpu_count() or 4)))
+WARM_PRELOAD = os.environ.get(
+    'WARM_PRELOAD', 'requests,bs4,feedparser,dateutil,jsonpath_ng,anthropic,openai'
+).split(',')
 
 # Logging Setup
 logging.basicConfig(
@@ -49,6 +118,68 @@ logging.basicConfig(
 logger = logging.getLogger('BotFactory')
 
 
+# ==================================================
+# Metrics
+# ==================================================
+
+RUNS = Counter('botfactory_runs_total', 'Finished bot runs', ['task', 'status'])
+RUN_DURATION = Histogram(
+    'botfactory_run_duration_seconds', 'Wall-clock duration of bot runs', ['task'],
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+)
+RUN_QUEUE_WAIT = Histogram(
+    'botfactory_run_queue_wait_seconds', 'Time runs waited in the run queue before starting',
+    buckets=(0.01, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900)
+)
+SCHEDULER_LAG = Histogram(
+    'botfactory_scheduler_lag_seconds', 'Delay between a job\'s scheduled time and its dispatch to the runner',
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300)
+)
+DB_QUERY = Histogram(
+    'botfactory_db_query_seconds', 'Time database calls hold a connection',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+)
+HTTP_REQUEST = Histogram(
+    'botfactory_http_request_duration_seconds', 'HTTP request latency until the response starts',
+    ['method', 'route', 'status']
+)
+
+
+class RunnerCollector:
+    """Run queue gauges, read from the active task manager at scrape time.
+    A collector rather than Gauges so the values stay correct when metrics
+    are aggregated across gunicorn workers (PROMETHEUS_MULTIPROC_DIR)."""
+
+    def describe(self):
+        yield GaugeMetricFamily('botfactory_run_queue_depth', 'Runs waiting for a free slot')
+        yield GaugeMetricFamily('botfactory_running_tasks', 'Tasks currently running')
+
+    def collect(self):
+        depth, running = self.describe()
+        manager = TaskManager.active
+        if manager:
+            depth.add_metric([], manager.runner.queue_snapshot()['depth'])
+            running.add_metric([], len(manager.runner.running_snapshot()))
+        yield depth
+        yield running
+
+
+RUNNER_COLLECTOR = RunnerCollector()
+REGISTRY.register(RUNNER_COLLECTOR)
+
+
+def percentiles(values: List[float]) -> Optional[Dict]:
+    """p50/p95/max of the values, None if there are none"""
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    return {
+        'p50': values[int(0.5 * (len(values) - 1))],
+        'p95': values[int(0.95 * (len(values) - 1))],
+        'max': values[-1]
+    }
+
+
 # ==================================================
 # Data Classes
 # ==================================================
@@ -64,26 +195,68 @@ class TaskConfig:
     timeout: int = 300
     env: Dict[str, str] = None
     description: str = ""
+    exec_mode: Optional[str] = None  # popen | warm, default EXEC_MODE
+    priority: int = 0  # Higher runs first when the run queue is backed up
+    misfire_grace_time: Optional[int] = 3600  # Seconds a missed run may start late, None = no limit
+    jitter: Optional[int] = None  # Random delay of up to N seconds added to each run
+    spread: Optional[int] = None  # Cron only: stable per-task offset within N seconds, default SCHEDULE_SPREAD
+    memory_limit: Optional[int] = None  # MB of address space (RLIMIT_AS), warm mode: on top of the preloaded modules
+    cpu_limit: Optional[int] = None  # CPU seconds (RLIMIT_CPU)
+    max_open_files: Optional[int] = None  # RLIMIT_NOFILE
+    nice: Optional[int] = None  # Added to the bot's nice level
 
     def __post_init__(self):
         if self.env is None:
             self.env = {}
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TaskConfig':
+        """Build a task from config or queue data, ignoring retired settings"""
+        data = dict(data)
+        for key in ('coalesce', 'max_instances'):
+            if data.pop(key, None) is not None:
+                logger.warning(f"Task {data.get('name')}: '{key}' is no longer supported and is ignored")
+        return cls(**data)
+
 
 # ==================================================
 # Database
 # ==================================================
 
 class Database:
-    """SQLite database for run history, logs, and bot configs"""
+    """SQLite database for run history, logs, and bot configs
+
+    Connections are kept in a small pool and reused across calls. A thread
+    holds one connection for the duration of a call; nested calls on the
+    same thread share it (and its transaction). The database runs in WAL
+    mode by default so dashboard reads never block on scheduler writes;
+    WAL relies on shared memory, so databases on network filesystems use
+    a rollback journal instead (DB_JOURNAL_MODE=DELETE).
+    """
 
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, pool_size: int = DB_POOL_SIZE):
         self.db_path = db_path
+        self.pool_size = pool_size
+        self._pool: queue.LifoQueue = queue.LifoQueue()
+        self._local = threading.local()
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         self._init_db()
 
     def _init_db(self):
         with self._get_conn() as conn:
+            # Pages freed by pruning are returned with PRAGMA incremental_vacuum.
+            # A new database switches right away (VACUUM of an empty file is
+            # instant); existing ones are converted by enable_incremental_vacuum().
+            if not conn.execute('SELECT 1 FROM sqlite_master').fetchone():
+                try:
+                    conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                    conn.execute('VACUUM')
+                except sqlite3.OperationalError:
+                    pass  # Another process is creating it
+
+            had_pruned_stats = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'run_stats_pruned'"
+            ).fetchone()
             conn.executescript('''
                 -- Task runs
                 CREATE TABLE IF NOT EXISTS runs (
@@ -95,7 +268,16 @@ class Database:
                     exit_code INTEGER,
                     output TEXT,
                     error TEXT,
-                    duration_seconds REAL
+                    duration_seconds REAL,
+                    cpu_user_seconds REAL,
+                    cpu_system_seconds REAL,
+                    max_rss_kb INTEGER,
+                    io_read_blocks INTEGER,
+                    io_write_blocks INTEGER,
+                    voluntary_ctx_switches INTEGER,
+                    involuntary_ctx_switches INTEGER,
+                    scheduled_at TEXT,
+                    dispatch_lag_seconds REAL
                 );
 
                 -- Task state
@@ -117,41 +299,174 @@ class Database:
                     updated_at TEXT NOT NULL
                 );
 
+                -- Run counters, maintained by log_run_end. One row per
+                -- day of started_at plus the all-time row day = '*'.
+                CREATE TABLE IF NOT EXISTS run_stats (
+                    day TEXT PRIMARY KEY,
+                    total_runs INTEGER NOT NULL DEFAULT 0,
+                    successful_runs INTEGER NOT NULL DEFAULT 0,
+                    failed_runs INTEGER NOT NULL DEFAULT 0
+                );
+
+                -- Counters of runs deleted by retention, per day of
+                -- started_at, added back when run_stats is rebuilt
+                CREATE TABLE IF NOT EXISTS run_stats_pruned (
+                    day TEXT PRIMARY KEY,
+                    total_runs INTEGER NOT NULL DEFAULT 0,
+                    successful_runs INTEGER NOT NULL DEFAULT 0,
+                    failed_runs INTEGER NOT NULL DEFAULT 0
+                );
+
+                -- Persistent APScheduler jobs (SQLiteJobStore)
+                CREATE TABLE IF NOT EXISTS scheduler_jobs (
+                    id TEXT PRIMARY KEY,
+                    next_run_time REAL,
+                    job_state BLOB NOT NULL
+                );
+
+                -- Runs waiting for or claimed by a worker agent (DatabaseBroker)
+                CREATE TABLE IF NOT EXISTS run_queue (
+                    run_id INTEGER PRIMARY KEY,
+                    task_name TEXT NOT NULL,
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    task TEXT NOT NULL,
+                    enqueued_at TEXT NOT NULL,
+                    claimed_by TEXT,
+                    claim_token TEXT,
+                    heartbeat_at REAL
+                );
+
                 CREATE INDEX IF NOT EXISTS idx_runs_task ON runs(task_name);
+                CREATE INDEX IF NOT EXISTS idx_jobs_next_run ON scheduler_jobs(next_run_time);
                 CREATE INDEX IF NOT EXISTS idx_runs_started ON runs(started_at);
             ''')
 
+            # Databases created before resource accounting and lag tracking: add the columns
+            existing = {row['name'] for row in conn.execute('PRAGMA table_info(runs)')}
+            added = [(column, sql_type) for column, _, sql_type in RUSAGE_COLUMNS]
+            added += [('scheduled_at', 'TEXT'), ('dispatch_lag_seconds', 'REAL')]
+            for column, sql_type in added:
+                if column not in existing:
+                    conn.execute(f'ALTER TABLE runs ADD COLUMN {column} {sql_type}')
+
+            # Databases pruned before run_stats_pruned existed: the counters
+            # still include the pruned runs, the difference to runs is theirs
+            if not had_pruned_stats:
+                conn.execute('''
+                    INSERT OR IGNORE INTO run_stats_pruned (day, total_runs, successful_runs, failed_runs)
+                    SELECT s.day, s.total_runs - COALESCE(r.total, 0),
+                           s.successful_runs - COALESCE(r.success, 0), s.failed_runs - COALESCE(r.failed, 0)
+                    FROM run_stats s LEFT JOIN (
+                        SELECT substr(started_at, 1, 10) AS day, COUNT(*) AS total,
+                               SUM(status = 'success') AS success, SUM(status != 'success') AS failed
+                        FROM runs WHERE finished_at IS NOT NULL
+                        GROUP BY day
+                    ) r ON r.day = s.day
+                    WHERE s.day != '*' AND s.total_runs > COALESCE(r.total, 0)
+                ''')
+
+            # Databases created before run_stats existed: seed it from runs
+            if not conn.execute("SELECT 1 FROM run_stats WHERE day = '*'").fetchone():
+                self._rebuild_stats(conn)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=DB_BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f'PRAGMA journal_mode={DB_JOURNAL_MODE}')
+        # NORMAL is only durable across power loss with a write-ahead log
+        conn.execute(f"PRAGMA synchronous={'NORMAL' if DB_JOURNAL_MODE == 'WAL' else 'FULL'}")
+        conn.execute(f'PRAGMA cache_size=-{DB_CACHE_KB}')
+        conn.execute(f'PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+
     @contextmanager
     def _get_conn(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            # Nested call on this thread: join the outer transaction
+            yield conn
+            return
+
+        started = time.perf_counter()
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+
+        self._local.conn = conn
         try:
             yield conn
             conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
         finally:
-            conn.close()
+            DB_QUERY.observe(time.perf_counter() - started)
+            self._local.conn = None
+            if self._pool.qsize() < self.pool_size:
+                self._pool.put(conn)
+            else:
+                conn.close()
+
+    def close(self):
+        """Close all pooled connections"""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
 
     # Run history methods
-    def log_run_start(self, task_name: str) -> int:
+    def log_run_start(self, task_name: str, status: str = 'running',
+                      scheduled_at: Optional[datetime] = None) -> int:
+        """Create a runs row; scheduled_at is the scheduler fire time the run belongs to"""
+        now = datetime.now()
+        lag = max(0.0, (now - scheduled_at).total_seconds()) if scheduled_at else None
         with self._get_conn() as conn:
             cursor = conn.execute(
-                'INSERT INTO runs (task_name, started_at, status) VALUES (?, ?, ?)',
-                (task_name, datetime.now().isoformat(), 'running')
+                'INSERT INTO runs (task_name, started_at, status, scheduled_at, dispatch_lag_seconds) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (task_name, now.isoformat(), status, scheduled_at.isoformat() if scheduled_at else None, lag)
             )
             return cursor.lastrowid
 
+    def mark_run_started(self, run_id: int):
+        """Move a queued run to running; started_at becomes the actual start"""
+        with self._get_conn() as conn:
+            conn.execute(
+                'UPDATE runs SET started_at = ?, status = ? WHERE id = ?',
+                (datetime.now().isoformat(), 'running', run_id)
+            )
+
     def log_run_end(self, run_id: int, status: str, exit_code: int,
-                    output: str, error: str, duration: float):
+                    output: str, error: str, duration: float, usage: Optional[Dict] = None):
+        """Finish a run; usage maps RUSAGE_COLUMNS names to the process's resource usage"""
+        usage = usage or {}
         with self._get_conn() as conn:
-            conn.execute('''
+            row = conn.execute(
+                'SELECT started_at, finished_at FROM runs WHERE id = ?', (run_id,)
+            ).fetchone()
+            conn.execute(f'''
                 UPDATE runs
                 SET finished_at = ?, status = ?, exit_code = ?,
-                    output = ?, error = ?, duration_seconds = ?
+                    output = ?, error = ?, duration_seconds = ?,
+                    {', '.join(f'{column} = ?' for column, _, _ in RUSAGE_COLUMNS)}
                 WHERE id = ?
             ''', (datetime.now().isoformat(), status, exit_code,
-                  output[:50000] if output else None,
-                  error[:50000] if error else None,
-                  duration, run_id))
+                  output[:RUN_OUTPUT_LIMIT] if output else None,
+                  error[:RUN_OUTPUT_LIMIT] if error else None,
+                  duration, *[usage.get(column) for column, _, _ in RUSAGE_COLUMNS], run_id))
+            if row and row['finished_at'] is None:
+                self._add_stats(conn, [(
+                    row['started_at'][:10], 1,
+                    1 if status == 'success' else 0,
+                    1 if status != 'success' else 0
+                )])
 
     def update_task_state(self, task_name: str, status: str):
         with self._get_conn() as conn:
@@ -162,9 +477,9 @@ class Database:
                     last_run = excluded.last_run,
                     last_status = excluded.last_status,
                     run_count = run_count + 1,
-                    error_count = error_count + CASE WHEN excluded.last_status = 'error' THEN 1 ELSE 0 END
+                    error_count = error_count + CASE WHEN excluded.last_status != 'success' THEN 1 ELSE 0 END
             ''', (task_name, datetime.now().isoformat(), status,
-                  1 if status == 'error' else 0))
+                  1 if status != 'success' else 0))
 
     def get_task_state(self, task_name: str) -> Optional[Dict]:
         with self._get_conn() as conn:
@@ -174,6 +489,11 @@ class Database:
             ).fetchone()
             return dict(row) if row else None
 
+    def get_all_task_states(self) -> Dict[str, Dict]:
+        with self._get_conn() as conn:
+            rows = conn.execute('SELECT * FROM task_state').fetchall()
+            return {row['task_name']: dict(row) for row in rows}
+
     def set_task_enabled(self, task_name: str, enabled: bool):
         with self._get_conn() as conn:
             conn.execute('''
@@ -202,41 +522,234 @@ class Database:
             row = conn.execute('SELECT * FROM runs WHERE id = ?', (run_id,)).fetchone()
             return dict(row) if row else None
 
+    def get_unfinished_runs(self) -> List[Dict]:
+        """Runs still marked queued or running"""
+        with self._get_conn() as conn:
+            rows = conn.execute(
+                "SELECT id, task_name, status, started_at FROM runs "
+                "WHERE finished_at IS NULL AND status IN ('queued', 'running')"
+            ).fetchall()
+            return [dict(row) for row in rows]
+
+    def get_run_ids(self, task_name: str) -> List[int]:
+        with self._get_conn() as conn:
+            rows = conn.execute('SELECT id FROM runs WHERE task_name = ?', (task_name,)).fetchall()
+            return [row[0] for row in rows]
+
     def delete_run(self, run_id: int) -> bool:
         with self._get_conn() as conn:
+            self._subtract_stats(conn, 'id = ?', (run_id,))
             cursor = conn.execute('DELETE FROM runs WHERE id = ?', (run_id,))
             return cursor.rowcount > 0
 
     def clear_runs(self, task_name: str = None) -> int:
         with self._get_conn() as conn:
             if task_name:
+                self._subtract_stats(conn, 'task_name = ?', (task_name,))
                 cursor = conn.execute('DELETE FROM runs WHERE task_name = ?', (task_name,))
             else:
+                conn.execute('DELETE FROM run_stats')
+                conn.execute('DELETE FROM run_stats_pruned')
                 cursor = conn.execute('DELETE FROM runs')
             return cursor.rowcount
 
-    def get_stats(self) -> Dict:
+    # Retention methods
+    def get_runs_before(self, cutoff: str, limit: int) -> List[int]:
+        """Oldest finished runs started before the ISO timestamp cutoff"""
         with self._get_conn() as conn:
-            total = conn.execute('SELECT COUNT(*) FROM runs').fetchone()[0]
-            success = conn.execute(
-                "SELECT COUNT(*) FROM runs WHERE status = 'success'"
-            ).fetchone()[0]
-            errors = conn.execute(
-                "SELECT COUNT(*) FROM runs WHERE status = 'error'"
-            ).fetchone()[0]
-            today = conn.execute('''
-                SELECT COUNT(*) FROM runs
-                WHERE date(started_at) = date('now')
-            ''').fetchone()[0]
+            rows = conn.execute(
+                'SELECT id FROM runs WHERE started_at < ? AND finished_at IS NOT NULL ORDER BY id LIMIT ?',
+                (cutoff, limit)
+            ).fetchall()
+            return [row[0] for row in rows]
 
-            return {
-                'total_runs': total,
-                'successful_runs': success,
-                'failed_runs': errors,
-                'runs_today': today,
-                'success_rate': round(success / total * 100, 1) if total > 0 else 0
+    def get_runs_beyond(self, keep: int, limit: int) -> List[int]:
+        """Finished runs older than the newest `keep` finished runs of their task"""
+        run_ids = []
+        with self._get_conn() as conn:
+            for (task_name,) in conn.execute('SELECT DISTINCT task_name FROM runs').fetchall():
+                rows = conn.execute(
+                    'SELECT id FROM runs WHERE task_name = ? AND finished_at IS NOT NULL '
+                    'ORDER BY id DESC LIMIT ? OFFSET ?',
+                    (task_name, limit - len(run_ids), keep)
+                ).fetchall()
+                run_ids.extend(row[0] for row in rows)
+                if len(run_ids) >= limit:
+                    break
+        return run_ids
+
+    def prune_runs(self, run_ids: List[int]):
+        """Delete runs for retention. Unlike delete_run, the run_stats counters
+        keep them, and run_stats_pruned remembers them for rebuild_stats."""
+        with self._get_conn() as conn:
+            for start in range(0, len(run_ids), 500):
+                chunk = run_ids[start:start + 500]
+                conn.execute(f'''
+                    INSERT INTO run_stats_pruned (day, total_runs, successful_runs, failed_runs)
+                    SELECT substr(started_at, 1, 10), COUNT(*),
+                           SUM(status = 'success'), SUM(status != 'success')
+                    FROM runs WHERE id IN ({', '.join('?' * len(chunk))}) AND finished_at IS NOT NULL
+                    GROUP BY 1
+                    ON CONFLICT(day) DO UPDATE SET
+                        total_runs = total_runs + excluded.total_runs,
+                        successful_runs = successful_runs + excluded.successful_runs,
+                        failed_runs = failed_runs + excluded.failed_runs
+                ''', chunk)
+            conn.executemany('DELETE FROM runs WHERE id = ?', [(run_id,) for run_id in run_ids])
+
+    def used_bytes(self) -> int:
+        """Size of the database without its free pages"""
+        with self._get_conn() as conn:
+            page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+            pages = conn.execute('PRAGMA page_count').fetchone()[0]
+            free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        return (pages - free) * page_size
+
+    def enable_incremental_vacuum(self) -> bool:
+        """Switch the database to incremental auto-vacuum; True once it uses it
+
+        Converting an existing database takes a full VACUUM, which needs the
+        database to itself. If other connections hold it, the conversion is
+        logged and left for the next call.
+        """
+        with self._get_conn() as conn:
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+                return True
+            logger.info("Converting the database to incremental auto-vacuum")
+            try:
+                conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                conn.execute('VACUUM')
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Converting the database to incremental auto-vacuum failed, will retry: {e}")
+                return False
+            return conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+
+    def incremental_vacuum(self, pages: int) -> int:
+        """Return up to `pages` free pages to the filesystem; returns the free pages left"""
+        with self._get_conn() as conn:
+            # executescript steps the pragma to completion; execute() frees a single page
+            conn.executescript(f'PRAGMA incremental_vacuum({int(pages)});')
+            return conn.execute('PRAGMA freelist_count').fetchone()[0]
+
+    # Statistics methods
+    def _add_stats(self, conn: sqlite3.Connection, deltas: List[tuple]):
+        """Apply (day, total, success, failed) deltas to the day rows and to '*'"""
+        rows = []
+        for day, total, success, failed in deltas:
+            rows.append((day, total, success, failed))
+            rows.append(('*', total, success, failed))
+        conn.executemany('''
+            INSERT INTO run_stats (day, total_runs, successful_runs, failed_runs)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(day) DO UPDATE SET
+                total_runs = total_runs + excluded.total_runs,
+                successful_runs = successful_runs + excluded.successful_runs,
+                failed_runs = failed_runs + excluded.failed_runs
+        ''', rows)
+
+    def _subtract_stats(self, conn: sqlite3.Connection, where: str, params: tuple):
+        """Remove the finished runs matching `where` from the counters"""
+        rows = conn.execute(f'''
+            SELECT substr(started_at, 1, 10) AS day, COUNT(*),
+                   SUM(status = 'success'), SUM(status != 'success')
+            FROM runs WHERE {where} AND finished_at IS NOT NULL
+            GROUP BY day
+        ''', params).fetchall()
+        self._add_stats(conn, [(r[0], -r[1], -r[2], -r[3]) for r in rows])
+
+    def _rebuild_stats(self, conn: sqlite3.Connection):
+        conn.execute('DELETE FROM run_stats')
+        conn.execute('''
+            INSERT INTO run_stats (day, total_runs, successful_runs, failed_runs)
+            SELECT substr(started_at, 1, 10), COUNT(*),
+                   SUM(status = 'success'), SUM(status != 'success')
+            FROM runs WHERE finished_at IS NOT NULL
+            GROUP BY 1
+        ''')
+        conn.execute('''
+            INSERT INTO run_stats (day, total_runs, successful_runs, failed_runs)
+            SELECT day, total_runs, successful_runs, failed_runs FROM run_stats_pruned WHERE true
+            ON CONFLICT(day) DO UPDATE SET
+                total_runs = total_runs + excluded.total_runs,
+                successful_runs = successful_runs + excluded.successful_runs,
+                failed_runs = failed_runs + excluded.failed_runs
+        ''')
+        conn.execute('''
+            INSERT INTO run_stats (day, total_runs, successful_runs, failed_runs)
+            SELECT '*', COALESCE(SUM(total_runs), 0),
+                   COALESCE(SUM(successful_runs), 0), COALESCE(SUM(failed_runs), 0)
+            FROM run_stats
+        ''')
+
+    def get_resource_stats(self, task_name: str = None, limit: int = 100) -> Dict[str, Dict]:
+        """p50/p95/max of each resource column over the last `limit` measured runs of each task"""
+        metrics = [column for column, _, _ in RUSAGE_COLUMNS]
+        with self._get_conn() as conn:
+            rows = conn.execute(f'''
+                SELECT task_name, {', '.join(metrics)} FROM (
+                    SELECT *, ROW_NUMBER() OVER (PARTITION BY task_name ORDER BY id DESC) AS n
+                    FROM runs WHERE cpu_user_seconds IS NOT NULL {'AND task_name = ?' if task_name else ''}
+                ) WHERE n <= ?
+            ''', (task_name, limit) if task_name else (limit,)).fetchall()
+
+        samples: Dict[str, List] = {}
+        for row in rows:
+            samples.setdefault(row['task_name'], []).append(row)
+
+        stats = {}
+        for name, task_rows in samples.items():
+            task_stats = {'runs': len(task_rows)}
+            columns = {'cpu_seconds': [r['cpu_user_seconds'] + r['cpu_system_seconds'] for r in task_rows]}
+            columns.update({metric: [r[metric] for r in task_rows] for metric in metrics})
+            for metric, values in columns.items():
+                metric_stats = percentiles(values)
+                if metric_stats:
+                    task_stats[metric] = metric_stats
+            stats[name] = task_stats
+        return stats
+
+    def get_lag_stats(self, limit: int = 500) -> Dict:
+        """Lag of the last scheduled runs behind their fire time: until the
+        runner got the run (dispatch) and until the bot started (start)"""
+        with self._get_conn() as conn:
+            rows = conn.execute('''
+                SELECT dispatch_lag_seconds,
+                       ROUND((julianday(started_at) - julianday(scheduled_at)) * 86400, 3) AS start_lag
+                FROM runs WHERE scheduled_at IS NOT NULL AND status != 'queued'
+                ORDER BY id DESC LIMIT ?
+            ''', (limit,)).fetchall()
+        return {
+            'runs': len(rows),
+            'dispatch': percentiles([row['dispatch_lag_seconds'] for row in rows]),
+            'start': percentiles([max(0.0, row['start_lag']) for row in rows])
+        }
+
+    def rebuild_stats(self) -> Dict:
+        """Recompute the run counters from the runs table and the counts of pruned runs"""
+        with self._get_conn() as conn:
+            self._rebuild_stats(conn)
+        return self.get_stats()
+
+    def get_stats(self) -> Dict:
+        today = datetime.now().date().isoformat()
+        with self._get_conn() as conn:
+            rows = {
+                row['day']: row for row in conn.execute(
+                    "SELECT * FROM run_stats WHERE day IN ('*', ?)", (today,)
+                ).fetchall()
             }
 
+        totals = rows.get('*')
+        total = totals['total_runs'] if totals else 0
+        success = totals['successful_runs'] if totals else 0
+        return {
+            'total_runs': total,
+            'successful_runs': success,
+            'failed_runs': totals['failed_runs'] if totals else 0,
+            'runs_today': rows[today]['total_runs'] if today in rows else 0,
+            'success_rate': round(success / total * 100, 1) if total > 0 else 0
+        }
+
     # Bot config methods
     def save_bot_config(self, name: str, config: dict) -> int:
         with self._get_conn() as conn:
@@ -274,72 +787,1266 @@ class Database:
             return cursor.rowcount > 0
 
 
+class JobUnpickler(pickle.Unpickler):
+    """Resolve classes of this module whether they were pickled by `python
+    app.py` (as __main__) or under a WSGI server (as app)"""
+
+    def find_class(self, module, name):
+        this = sys.modules[__name__]
+        if module in ('__main__', 'app') and hasattr(this, name):
+            return getattr(this, name)
+        return super().find_class(module, name)
+
+
+class SQLiteJobStore(BaseJobStore):
+    """APScheduler job store in the scheduler_jobs table of the app database
+
+    Jobs and their next run times survive restarts, so the scheduler can
+    apply each job's misfire policy to runs missed while it was down. The
+    scheduler is the table's only user, so jobs are loaded once at start and
+    served from memory; writes go through to SQLite.
+    """
+
+    def __init__(self, db: Database, pickle_protocol: int = pickle.HIGHEST_PROTOCOL):
+        super().__init__()
+        self.db = db
+        self.pickle_protocol = pickle_protocol
+        self._jobs: Dict[str, Job] = {}
+
+    def start(self, scheduler, alias):
+        super().start(scheduler, alias)
+        with self.db._get_conn() as conn:
+            rows = conn.execute('SELECT id, job_state FROM scheduler_jobs').fetchall()
+
+        self._jobs, failed = {}, []
+        for row in rows:
+            try:
+                state = JobUnpickler(io.BytesIO(row['job_state'])).load()
+                if state['func'].startswith('__main__:'):
+                    state['func'] = 'app:' + state['func'].split(':', 1)[1]
+                state['jobstore'] = self
+                job = Job.__new__(Job)
+                job.__setstate__(state)
+                job._scheduler = scheduler
+                job._jobstore_alias = alias
+                self._jobs[job.id] = job
+            except Exception:
+                self._logger.exception(f"Unable to restore job {row['id']}, removing it")
+                failed.append((row['id'],))
+        if failed:
+            with self.db._get_conn() as conn:
+                conn.executemany('DELETE FROM scheduler_jobs WHERE id = ?', failed)
+
+    def _sorted_jobs(self) -> List[Job]:
+        return sorted(
+            self._jobs.values(),
+            key=lambda job: (job.next_run_time is None,
+                             datetime_to_utc_timestamp(job.next_run_time) or 0, job.id)
+        )
+
+    def lookup_job(self, job_id):
+        return self._jobs.get(job_id)
+
+    def get_due_jobs(self, now):
+        now_timestamp = datetime_to_utc_timestamp(now)
+        return [
+            job for job in self._sorted_jobs()
+            if job.next_run_time is not None and datetime_to_utc_timestamp(job.next_run_time) <= now_timestamp
+        ]
+
+    def get_next_run_time(self):
+        times = [job.next_run_time for job in self._jobs.values() if job.next_run_time is not None]
+        return min(times) if times else None
+
+    def get_all_jobs(self):
+        return self._sorted_jobs()
+
+    def _write(self, conn: sqlite3.Connection, sql: str, job: Job):
+        conn.execute(sql, (
+            datetime_to_utc_timestamp(job.next_run_time),
+            pickle.dumps(job.__getstate__(), self.pickle_protocol),
+            job.id
+        ))
+
+    def add_job(self, job):
+        if job.id in self._jobs:
+            raise ConflictingIdError(job.id)
+        with self.db._get_conn() as conn:
+            self._write(conn, 'INSERT OR REPLACE INTO scheduler_jobs (next_run_time, job_state, id) '
+                              'VALUES (?, ?, ?)', job)
+        self._jobs[job.id] = job
+
+    def update_job(self, job):
+        if job.id not in self._jobs:
+            raise JobLookupError(job.id)
+        with self.db._get_conn() as conn:
+            self._write(conn, 'UPDATE scheduler_jobs SET next_run_time = ?, job_state = ? WHERE id = ?', job)
+        self._jobs[job.id] = job
+
+    def remove_job(self, job_id):
+        if job_id not in self._jobs:
+            raise JobLookupError(job_id)
+        with self.db._get_conn() as conn:
+            conn.execute('DELETE FROM scheduler_jobs WHERE id = ?', (job_id,))
+        del self._jobs[job_id]
+
+    def remove_all_jobs(self):
+        with self.db._get_conn() as conn:
+            conn.execute('DELETE FROM scheduler_jobs')
+        self._jobs = {}
+
+
+# ==================================================
+# Event Bus
+# ==================================================
+
+class EventBus:
+    """In-process publish/subscribe for task and run events"""
+
+    def __init__(self, max_queue: int = 100):
+        self.max_queue = max_queue
+        self._subscribers: set = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> queue.Queue:
+        subscription = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: queue.Queue):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event: str, data: Dict, version: int = 0):
+        message = {'event': event, 'data': data, 'version': version}
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.put_nowait(message)
+            except queue.Full:
+                # Slow consumer: drop its backlog and tell it to refetch everything
+                while True:
+                    try:
+                        subscription.get_nowait()
+                    except queue.Empty:
+                        break
+                subscription.put_nowait({'event': 'resync', 'data': {}, 'version': version})
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
 # ==================================================
 # Task Runner
 # ==================================================
 
+class OutputBuffer:
+    """Bounded capture of a process stream: the first and the last bytes written"""
+
+    MARKER = '\n... [{} bytes truncated] ...\n'
+
+    def __init__(self, limit: int = RUN_OUTPUT_LIMIT):
+        self.head_limit = limit // 2
+        self.tail_limit = limit // 2 - 100  # Leave room for the marker
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+
+    def write(self, chunk: bytes):
+        self.total += len(chunk)
+        room = self.head_limit - len(self.head)
+        if room > 0:
+            self.head += chunk[:room]
+            chunk = chunk[room:]
+        if chunk:
+            self.tail += chunk
+            if len(self.tail) > self.tail_limit:
+                del self.tail[:len(self.tail) - self.tail_limit]
+
+    def text(self) -> str:
+        dropped = self.total - len(self.head) - len(self.tail)
+        head = self.head.decode('utf-8', errors='replace')
+        tail = self.tail.decode('utf-8', errors='replace')
+        if dropped:
+            return head + self.MARKER.format(dropped) + tail
+        return head + tail
+
+
+# Executed with `python -c` for popen-mode bots with resource limits: applies
+# them in the new interpreter, then runs the script as `python script.py`
+# would. A preexec_fn would run Python code between fork and exec, which is
+# unsafe in the multi-threaded manager.
+_LIMITS_BOOTSTRAP = r'''
+import os, sys, json, runpy, resource
+
+limits, nice, script = json.loads(sys.argv[1]), int(sys.argv[2]), sys.argv[3]
+for limit, soft, hard in limits:
+    resource.setrlimit(limit, (soft, hard))
+if nice:
+    try:
+        os.nice(nice)
+    except OSError:
+        pass  # Negative values need CAP_SYS_NICE
+sys.argv = [script]
+sys.path[0] = os.path.dirname(script)
+runpy.run_path(script, run_name='__main__')
+'''
+
+
+# Forkserver executed with `python -c`. Imports the common bot dependencies
+# once, then forks a fresh child per run request received on the socket.
+_ZYGOTE_SOURCE = r'''
+import os, sys, json, signal, select, socket, runpy, resource, traceback, importlib
+
+sock = socket.socket(fileno=int(sys.argv[1]))
+for name in filter(None, sys.argv[2].split(',')):
+    try:
+        importlib.import_module(name.strip())
+    except Exception:
+        pass
+
+wake_r, wake_w = os.pipe()
+os.set_blocking(wake_r, False)
+os.set_blocking(wake_w, False)
+signal.set_wakeup_fd(wake_w)
+signal.signal(signal.SIGCHLD, lambda *args: None)
+children = {}  # pid -> request id
+
+
+def send(message):
+    sock.send(json.dumps(message).encode())
+
+
+def address_space():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * resource.getpagesize()
+    except OSError:
+        return 0
+
+
+def setup_child(request, fds):
+    signal.set_wakeup_fd(-1)
+    for sig in (signal.SIGCHLD, signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, signal.SIG_DFL)
+    sock.close()
+    os.close(wake_r)
+    os.close(wake_w)
+
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.dup2(fds[0], 1)
+    os.dup2(fds[1], 2)
+    for fd in (devnull, *fds):
+        os.close(fd)
+
+    for limit, soft, hard in request['limits']:
+        if limit == resource.RLIMIT_AS:
+            # The preloaded modules are already mapped: the limit counts from here
+            ceiling = resource.getrlimit(limit)[1]
+            soft = hard = soft + address_space()
+            if ceiling != resource.RLIM_INFINITY:
+                soft = hard = min(soft, ceiling)
+        resource.setrlimit(limit, (soft, hard))
+    if request['nice']:
+        try:
+            os.nice(request['nice'])
+        except OSError:
+            pass
+
+    os.chdir(request['cwd'])
+    os.environ.clear()
+    os.environ.update(request['env'])
+    unbuffered = bool(os.environ.get('PYTHONUNBUFFERED'))
+    sys.stdout = open(1, 'w', buffering=1 if unbuffered else -1, closefd=False)
+    sys.stderr = open(2, 'w', buffering=1, errors='backslashreplace', closefd=False)
+    sys.argv = [request['script']]
+    sys.path[0] = os.path.dirname(request['script'])
+
+
+def run_child(request, fds):
+    # Never return into the accept loop: this is a forked copy of it
+    try:
+        setup_child(request, fds)
+    except BaseException:
+        try:
+            os.write(2, traceback.format_exc().encode(errors='backslashreplace'))
+        finally:
+            os._exit(127)
+
+    code = 0
+    try:
+        runpy.run_path(request['script'], run_name='__main__')
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            code = e.code or 0
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    try:
+        import threading, atexit
+        threading._shutdown()
+        atexit._run_exitfuncs()
+        sys.stdout.flush()
+        sys.stderr.flush()
+    except BaseException:
+        pass
+    os._exit(code & 0xff)
+
+
+while True:
+    ready, _, _ = select.select([sock, wake_r], [], [])
+    if wake_r in ready:
+        try:
+            while os.read(wake_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+    while children:
+        try:
+            pid, status, usage = os.wait4(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if not pid:
+            break
+        send({'op': 'exit', 'id': children.pop(pid), 'code': os.waitstatus_to_exitcode(status),
+              'usage': list(usage)})
+    if sock not in ready:
+        continue
+
+    data, fds, _, _ = socket.recv_fds(sock, 1 << 20, 2)
+    if not data:
+        break  # Manager went away
+    request = json.loads(data)
+    if request['op'] == 'spawn':
+        try:
+            pid = os.fork()
+        except OSError as e:
+            send({'op': 'error', 'id': request['id'], 'error': str(e)})
+        else:
+            if pid == 0:
+                run_child(request, fds)
+            children[pid] = request['id']
+            send({'op': 'spawned', 'id': request['id'], 'pid': pid})
+        for fd in fds:
+            os.close(fd)
+    elif request['op'] == 'kill':
+        for pid, request_id in children.items():
+            if request_id == request['id']:
+                os.kill(pid, signal.SIGKILL)
+'''
+
+
+class WarmProcess:
+    """A bot process forked by the WarmPool; mirrors the parts of Popen TaskRunner uses"""
+
+    def __init__(self, pool: 'WarmPool', request_id: int, args: List[str], stdout, stderr):
+        self.pool = pool
+        self.request_id = request_id
+        self.args = args
+        self.stdout = stdout
+        self.stderr = stderr
+        self.channel = pool._sock
+        self.pid: Optional[int] = None
+        self.returncode: Optional[int] = None
+        self.rusage: Optional[resource.struct_rusage] = None  # Sent by the forkserver on exit
+        self.error: Optional[str] = None
+        self._spawned = threading.Event()
+        self._exited = threading.Event()
+
+    def poll(self) -> Optional[int]:
+        return self.returncode
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        if not self._exited.wait(timeout):
+            raise subprocess.TimeoutExpired(self.args, timeout)
+        return self.returncode
+
+    def kill(self):
+        if not self._exited.is_set():
+            self.pool._send({'op': 'kill', 'id': self.request_id})
+
+
+class WarmPool:
+    """Forkserver for bot scripts
+
+    A long-lived interpreter imports the usual bot dependencies once and
+    forks a fresh child for every run, so scripts skip interpreter startup
+    and those imports while still running in their own process with their
+    own env and cwd.
+    """
+
+    def __init__(self, preload: List[str] = WARM_PRELOAD):
+        self.preload = preload
+        self._proc: Optional[subprocess.Popen] = None
+        self._sock: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+        self._processes: Dict[int, WarmProcess] = {}
+        self._next_id = 0
+
+    def _ensure_started(self):
+        if self._proc and self._proc.poll() is None:
+            if self._sock:
+                return
+            self._proc.kill()
+        parent, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        self._proc = subprocess.Popen(
+            [sys.executable, '-c', _ZYGOTE_SOURCE, str(child.fileno()), ','.join(self.preload)],
+            pass_fds=(child.fileno(),),
+            stdin=subprocess.DEVNULL
+        )
+        child.close()
+        self._sock = parent
+        threading.Thread(target=self._read_loop, args=(parent,), daemon=True).start()
+        logger.info(f"Warm pool started (pid {self._proc.pid})")
+
+    def _send(self, message: Dict, fds: List[int] = ()):
+        socket.send_fds(self._sock, [json.dumps(message).encode()], list(fds))
+
+    def _read_loop(self, sock: socket.socket):
+        while True:
+            try:
+                data = sock.recv(65536)
+            except OSError:
+                data = b''
+            if not data:
+                break
+            message = json.loads(data)
+            with self._lock:
+                process = self._processes.get(message['id'])
+                if message['op'] == 'exit':
+                    self._processes.pop(message['id'], None)
+            if not process:
+                continue
+            if message['op'] == 'spawned':
+                process.pid = message['pid']
+                process._spawned.set()
+            elif message['op'] == 'error':
+                process.error = message['error']
+                process._spawned.set()
+            elif message['op'] == 'exit':
+                process.rusage = resource.struct_rusage(message['usage'])
+                process.returncode = message['code']
+                process._exited.set()
+
+        # Forkserver gone: fail everything it still owned
+        with self._lock:
+            if self._sock is sock:
+                self._sock = None
+            orphans = [p for p in self._processes.values() if p.channel is sock]
+            for process in orphans:
+                del self._processes[process.request_id]
+        for process in orphans:
+            process.error = process.error or 'Warm pool exited'
+            if process.returncode is None:
+                process.returncode = -9
+            process._spawned.set()
+            process._exited.set()
+
+    def spawn(self, script_path: str, env: Dict[str, str], cwd: str,
+              limits: List[tuple] = (), nice: Optional[int] = None) -> WarmProcess:
+        out_r, out_w = os.pipe()
+        err_r, err_w = os.pipe()
+        try:
+            with self._lock:
+                self._ensure_started()
+                self._next_id += 1
+                process = WarmProcess(
+                    self, self._next_id, [script_path],
+                    os.fdopen(out_r, 'rb'), os.fdopen(err_r, 'rb')
+                )
+                self._processes[process.request_id] = process
+                self._send({
+                    'op': 'spawn', 'id': process.request_id,
+                    'script': script_path, 'env': env, 'cwd': cwd,
+                    'limits': list(limits), 'nice': nice
+                }, [out_w, err_w])
+        finally:
+            os.close(out_w)
+            os.close(err_w)
+
+        if not process._spawned.wait(timeout=30) or process.pid is None:
+            process.stdout.close()
+            process.stderr.close()
+            raise OSError(f"Warm pool could not start {script_path}: {process.error or 'timeout'}")
+        return process
+
+    def close(self):
+        with self._lock:
+            if self._sock:
+                self._sock.close()
+                self._sock = None
+            if self._proc:
+                try:
+                    self._proc.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    self._proc.kill()
+                self._proc = None
+
+
+class RunQueue:
+    """Bounded executor for bot runs
+
+    At most `max_concurrent` runs execute at once. Waiting runs are taken by
+    priority, then in submission order, and a key can only be queued once.
+    Worker threads start with the first submit(), so runners that never
+    queue runs (worker agents, brokered schedulers) don't create them.
+    """
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT_RUNS,
+                 on_change: Optional[Callable[[str, Dict], None]] = None):
+        self.max_concurrent = max(1, max_concurrent)
+        self.on_change = on_change
+        self._heap: List[tuple] = []  # (-priority, seq, key)
+        self._entries: Dict[str, Dict] = {}  # key -> queued run
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._active = 0
+        self._stopped = False
+        self._waits = deque(maxlen=100)  # Seconds queued, most recent starts
+        self._workers: List[threading.Thread] = []
+
+    def _notify(self, event: str, data: Dict):
+        if self.on_change:
+            self.on_change(event, data)
+
+    def submit(self, key: str, func: Callable[[], Any], priority: int = 0,
+               meta: Optional[Dict] = None) -> Optional[Future]:
+        """Queue func under key; returns None if key is already waiting.
+        meta is passed along in queue events and snapshots."""
+        with self._cond:
+            if self._stopped or key in self._entries:
+                return None
+            if not self._workers:
+                self._workers = [
+                    threading.Thread(target=self._worker, name=f'run-worker-{i}', daemon=True)
+                    for i in range(self.max_concurrent)
+                ]
+                for worker in self._workers:
+                    worker.start()
+            future = Future()
+            seq = next(self._seq)
+            self._entries[key] = {
+                'seq': seq,
+                'func': func,
+                'future': future,
+                'priority': priority,
+                'meta': meta or {},
+                'enqueued': time.monotonic(),
+                'queued_at': datetime.now().isoformat()
+            }
+            heapq.heappush(self._heap, (-priority, seq, key))
+            self._cond.notify()
+            depth = len(self._entries)
+        self._notify('task_queued', {'task': key, 'priority': priority, 'depth': depth, **(meta or {})})
+        return future
+
+    def cancel(self, key: str) -> bool:
+        """Drop a waiting run; runs already started are not affected"""
+        with self._cond:
+            entry = self._entries.pop(key, None)
+        if not entry:
+            return False
+        entry['future'].cancel()
+        self._notify('task_dequeued', {'task': key, 'cancelled': True, **entry['meta']})
+        return True
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                entry = None
+                while entry is None:
+                    while not self._heap and not self._stopped:
+                        self._cond.wait()
+                    if self._stopped:
+                        return
+                    _, seq, key = heapq.heappop(self._heap)
+                    # Skip heap items left behind by cancel()
+                    if key in self._entries and self._entries[key]['seq'] == seq:
+                        entry = self._entries.pop(key)
+                wait = time.monotonic() - entry['enqueued']
+                self._waits.append(wait)
+                self._active += 1
+
+            self._notify('task_dequeued', {'task': key, 'wait': round(wait, 3), **entry['meta']})
+            future = entry['future']
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(entry['func']())
+                    except Exception as e:
+                        logger.exception(f"Queued run {key} failed")
+                        future.set_exception(e)
+            finally:
+                with self._cond:
+                    self._active -= 1
+
+    def snapshot(self) -> Dict:
+        """Queue depth, wait times and the waiting runs in dispatch order"""
+        with self._cond:
+            order = sorted(
+                self._entries,
+                key=lambda k: (-self._entries[k]['priority'], self._entries[k]['seq'])
+            )
+            waiting = [
+                {'task': k, 'position': i + 1, 'priority': self._entries[k]['priority'],
+                 'queued_at': self._entries[k]['queued_at'], **self._entries[k]['meta']}
+                for i, k in enumerate(order)
+            ]
+            waits = list(self._waits)
+            active = self._active
+        return {
+            'depth': len(waiting),
+            'active': active,
+            'max_concurrent': self.max_concurrent,
+            'avg_wait': round(sum(waits) / len(waits), 3) if waits else 0,
+            'max_wait': round(max(waits), 3) if waits else 0,
+            'waiting': waiting
+        }
+
+    def close(self):
+        with self._cond:
+            self._stopped = True
+            entries = list(self._entries.values())
+            self._entries.clear()
+            self._heap.clear()
+            self._cond.notify_all()
+        for entry in entries:
+            entry['future'].cancel()
+
+
+class RunBroker(ABC):
+    """Hands queued runs to worker agents
+
+    submit() publishes a run, claim() hands the next one to a worker,
+    finish() retires it. Claimed runs that stop sending heartbeats are
+    returned by stale() so the dispatcher can fail them.
+    """
+
+    @abstractmethod
+    def submit(self, task: TaskConfig, run_id: int):
+        pass
+
+    @abstractmethod
+    def claim(self, worker: str) -> Optional[tuple]:
+        """Next run as (TaskConfig, run_id), or None if nothing is waiting"""
+
+    @abstractmethod
+    def heartbeat(self, run_ids: List[int]):
+        pass
+
+    @abstractmethod
+    def finish(self, run_id: int):
+        pass
+
+    @abstractmethod
+    def cancel(self, run_id: int) -> bool:
+        """Withdraw a run that no worker has claimed yet"""
+
+    @abstractmethod
+    def entries(self) -> List[Dict]:
+        """All queued and claimed runs, claimed first, then in dispatch order"""
+
+    def stale(self, timeout: float) -> List[Dict]:
+        now = time.time()
+        return [e for e in self.entries() if e['claimed_by'] and now - e['heartbeat_at'] > timeout]
+
+
+class LocalBroker(RunBroker):
+    """In-process stand-in for DatabaseBroker; agents run as threads of this process"""
+
+    def __init__(self):
+        self._entries: Dict[int, Dict] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, task: TaskConfig, run_id: int):
+        with self._lock:
+            self._entries[run_id] = {
+                'run_id': run_id, 'task_name': task.name, 'priority': task.priority,
+                'task': task, 'enqueued_at': datetime.now().isoformat(),
+                'claimed_by': None, 'heartbeat_at': None
+            }
+
+    def claim(self, worker: str) -> Optional[tuple]:
+        with self._lock:
+            waiting = [e for e in self._entries.values() if not e['claimed_by']]
+            if not waiting:
+                return None
+            entry = min(waiting, key=lambda e: (-e['priority'], e['run_id']))
+            entry['claimed_by'] = worker
+            entry['heartbeat_at'] = time.time()
+            return entry['task'], entry['run_id']
+
+    def heartbeat(self, run_ids: List[int]):
+        with self._lock:
+            for run_id in run_ids:
+                if run_id in self._entries:
+                    self._entries[run_id]['heartbeat_at'] = time.time()
+
+    def finish(self, run_id: int):
+        with self._lock:
+            self._entries.pop(run_id, None)
+
+    def cancel(self, run_id: int) -> bool:
+        with self._lock:
+            entry = self._entries.get(run_id)
+            if not entry or entry['claimed_by']:
+                return False
+            del self._entries[run_id]
+            return True
+
+    def entries(self) -> List[Dict]:
+        with self._lock:
+            entries = [
+                {k: v for k, v in e.items() if k != 'task'} for e in self._entries.values()
+            ]
+        return sorted(entries, key=lambda e: (e['claimed_by'] is None, -e['priority'], e['run_id']))
+
+
+class DatabaseBroker(RunBroker):
+    """Run queue in the run_queue table of the shared database
+
+    Agents on any node with access to the database and the bots directory
+    claim runs with a single UPDATE, so each run is claimed exactly once.
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    def submit(self, task: TaskConfig, run_id: int):
+        with self.db._get_conn() as conn:
+            conn.execute(
+                'INSERT INTO run_queue (run_id, task_name, priority, task, enqueued_at) VALUES (?, ?, ?, ?, ?)',
+                (run_id, task.name, task.priority, json.dumps(asdict(task)), datetime.now().isoformat())
+            )
+
+    def claim(self, worker: str) -> Optional[tuple]:
+        token = uuid.uuid4().hex
+        with self.db._get_conn() as conn:
+            conn.execute('''
+                UPDATE run_queue SET claimed_by = ?, claim_token = ?, heartbeat_at = ?
+                WHERE run_id = (
+                    SELECT run_id FROM run_queue WHERE claimed_by IS NULL
+                    ORDER BY priority DESC, run_id LIMIT 1
+                ) AND claimed_by IS NULL
+            ''', (worker, token, time.time()))
+            row = conn.execute(
+                'SELECT run_id, task FROM run_queue WHERE claim_token = ?', (token,)
+            ).fetchone()
+        if not row:
+            return None
+        return TaskConfig.from_dict(json.loads(row['task'])), row['run_id']
+
+    def heartbeat(self, run_ids: List[int]):
+        if not run_ids:
+            return
+        with self.db._get_conn() as conn:
+            conn.executemany(
+                'UPDATE run_queue SET heartbeat_at = ? WHERE run_id = ?',
+                [(time.time(), run_id) for run_id in run_ids]
+            )
+
+    def finish(self, run_id: int):
+        with self.db._get_conn() as conn:
+            conn.execute('DELETE FROM run_queue WHERE run_id = ?', (run_id,))
+
+    def cancel(self, run_id: int) -> bool:
+        with self.db._get_conn() as conn:
+            cursor = conn.execute(
+                'DELETE FROM run_queue WHERE run_id = ? AND claimed_by IS NULL', (run_id,)
+            )
+            return cursor.rowcount > 0
+
+    def entries(self) -> List[Dict]:
+        with self.db._get_conn() as conn:
+            rows = conn.execute('''
+                SELECT run_id, task_name, priority, enqueued_at, claimed_by, heartbeat_at
+                FROM run_queue ORDER BY claimed_by IS NULL, priority DESC, run_id
+            ''').fetchall()
+        return [dict(row) for row in rows]
+
+
+class WorkerAgent:
+    """Executes runs claimed from a broker with a local TaskRunner
+
+    The runner reports results through log_run_end like any other run.
+    """
+
+    def __init__(self, broker: RunBroker, runner: 'TaskRunner', concurrency: int = MAX_CONCURRENT_RUNS,
+                 worker_id: Optional[str] = None):
+        self.broker = broker
+        self.runner = runner
+        self.concurrency = max(1, concurrency)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._claimed: set = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        self._threads = [
+            threading.Thread(target=self._work, name=f'agent-{i}', daemon=True)
+            for i in range(self.concurrency)
+        ]
+        for thread in self._threads:
+            thread.start()
+        threading.Thread(target=self._heartbeat, name='agent-heartbeat', daemon=True).start()
+        logger.info(f"Worker agent {self.worker_id} started ({self.concurrency} slots)")
+
+    def stop(self):
+        """Stop claiming runs and wait for the ones in progress"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                claimed = self.broker.claim(self.worker_id)
+            except Exception:
+                logger.exception("Claiming a run failed")
+                claimed = None
+            if not claimed:
+                self._stop.wait(AGENT_POLL_INTERVAL)
+                continue
+
+            task, run_id = claimed
+            with self._lock:
+                self._claimed.add(run_id)
+            try:
+                self.runner.run_task(task, run_id)
+            finally:
+                with self._lock:
+                    self._claimed.discard(run_id)
+                self.broker.finish(run_id)
+
+    def _heartbeat(self):
+        while not self._stop.wait(AGENT_HEARTBEAT):
+            with self._lock:
+                run_ids = list(self._claimed)
+            try:
+                self.broker.heartbeat(run_ids)
+            except Exception:
+                logger.exception("Agent heartbeat failed")
+
+
 class TaskRunner:
     """Executes Python scripts"""
 
-    def __init__(self, db: Database, bots_path: str):
+    def __init__(self, db: Database, bots_path: str,
+                 on_change: Optional[Callable[[str, Dict], None]] = None,
+                 logs_path: str = LOGS_PATH, exec_mode: str = EXEC_MODE,
+                 max_concurrent: int = MAX_CONCURRENT_RUNS, broker: Optional[RunBroker] = None):
         self.db = db
         self.bots_path = bots_path
-        self.running_tasks: Dict[str, subprocess.Popen] = {}
+        self.on_change = on_change
+        self.exec_mode = exec_mode
+        self.warm_pool = WarmPool() if exec_mode == 'warm' else None
+        self.queue = RunQueue(max_concurrent, on_change=on_change)
+        self.broker = broker  # Runs go to worker agents instead of self.queue
+        self._broker_waits = deque(maxlen=100)  # Seconds queued before an agent claimed the run
+        self._broker_stop = threading.Event()
+        if broker:
+            threading.Thread(target=self._watch_broker, name='broker-watch', daemon=True).start()
+        self.logs_path = logs_path or os.path.join(os.path.dirname(db.db_path), 'logs')
+        os.makedirs(self.logs_path, exist_ok=True)
+        self.running_tasks: Dict[str, Optional[subprocess.Popen]] = {}  # None while starting
+        self.active_runs: Dict[int, str] = {}  # run_id -> task name
+        self.queued_runs: Dict[str, int] = {}  # task name -> run_id waiting in the queue
         self._lock = threading.Lock()
 
-    def run_task(self, task: TaskConfig) -> Dict:
-        """Execute a task and log the result"""
+    def _notify(self, event: str, data: Dict):
+        if self.on_change:
+            self.on_change(event, data)
+
+    def log_path(self, run_id: int) -> str:
+        """Combined stdout/stderr log of a running run; removed once the run
+        has stored the head and tail of its output"""
+        return os.path.join(self.logs_path, f'run_{run_id}.log')
+
+    def delete_logs(self, run_ids: Optional[List[int]] = None):
+        """Remove the log files of the given runs, or of all runs"""
+        if run_ids is None:
+            run_ids = [
+                int(name[4:-4]) for name in os.listdir(self.logs_path)
+                if name.startswith('run_') and name.endswith('.log') and name[4:-4].isdigit()
+            ]
+        with self._lock:
+            active = set(self.active_runs)
+        for run_id in run_ids:
+            if run_id in active:
+                continue
+            try:
+                os.remove(self.log_path(run_id))
+            except FileNotFoundError:
+                pass
+
+    def is_run_active(self, run_id: int) -> bool:
+        if self.broker and any(e['run_id'] == run_id and e['claimed_by'] for e in self.broker.entries()):
+            return True
+        with self._lock:
+            return run_id in self.active_runs
+
+    def is_run_queued(self, run_id: int) -> bool:
+        if self.broker:
+            return any(e['run_id'] == run_id and not e['claimed_by'] for e in self.broker.entries())
+        with self._lock:
+            return run_id in self.queued_runs.values()
+
+    @staticmethod
+    def _limits(task: TaskConfig) -> List[tuple]:
+        """setrlimit() arguments for the task's limits as (RLIMIT_*, soft, hard)"""
+        requested = [
+            (resource.RLIMIT_AS, task.memory_limit and task.memory_limit * 1024 * 1024),
+            (resource.RLIMIT_CPU, task.cpu_limit),
+            (resource.RLIMIT_NOFILE, task.max_open_files),
+        ]
+        limits = []
+        for limit, value in requested:
+            if not value:
+                continue
+            _, hard = resource.getrlimit(limit)
+            if hard != resource.RLIM_INFINITY:
+                value = min(value, hard)
+            # SIGXCPU at the CPU limit, SIGKILL a second later if the bot ignores it
+            limits.append((limit, value, value + 1 if limit == resource.RLIMIT_CPU else value))
+        return limits
+
+    def _spawn(self, task: TaskConfig, script_path: str, env: Dict[str, str]):
+        """Start the bot process in the task's execution mode"""
+        cwd = os.path.dirname(script_path) or self.bots_path
+        limits = self._limits(task)
+        if (task.exec_mode or self.exec_mode) == 'warm':
+            if not self.warm_pool:
+                self.warm_pool = WarmPool()
+            try:
+                return self.warm_pool.spawn(script_path, env, cwd, limits, task.nice)
+            except OSError as e:
+                logger.warning(f"{e}; falling back to a new interpreter")
+
+        args = [sys.executable, script_path]
+        if limits or task.nice:
+            args = [sys.executable, '-c', _LIMITS_BOOTSTRAP, json.dumps(limits), str(task.nice or 0), script_path]
+        return subprocess.Popen(
+            args,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+            cwd=cwd
+        )
+
+    @staticmethod
+    def _limit_exceeded(task: TaskConfig, exit_code: int, usage: Optional[Dict], error: str) -> Optional[str]:
+        """Describe the resource limit that ended a failed run, if any"""
+        if exit_code == 0:
+            return None
+        if task.cpu_limit:
+            cpu = usage['cpu_user_seconds'] + usage['cpu_system_seconds'] if usage else 0
+            if exit_code == -signal.SIGXCPU or (exit_code == -signal.SIGKILL and cpu >= task.cpu_limit):
+                return f'CPU limit of {task.cpu_limit}s exceeded'
+        tail = error[-2000:]
+        if task.memory_limit and 'MemoryError' in tail:
+            return f'Memory limit of {task.memory_limit} MB exceeded'
+        if task.max_open_files and 'Too many open files' in tail:
+            return f'Open file limit of {task.max_open_files} reached'
+        return None
+
+    def submit(self, task: TaskConfig, scheduled_at: Optional[datetime] = None) -> Dict:
+        """Queue a run of the task and return its run_id without waiting for it
+
+        scheduled_at is the scheduler fire time for scheduled runs.
+        """
+        script_path = os.path.join(self.bots_path, task.script)
+        if not os.path.exists(script_path):
+            logger.error(f"Script not found: {script_path}")
+            return {'status': 'error', 'error': f'Script not found: {task.script}'}
+
+        if self.broker:
+            if any(e['task_name'] == task.name for e in self.broker.entries()):
+                logger.warning(f"Task {task.name} is already running or queued")
+                return {'status': 'skipped', 'error': 'Task is already running or queued'}
+            run_id = self.db.log_run_start(task.name, status='queued', scheduled_at=scheduled_at)
+            self.broker.submit(task, run_id)
+            self._notify('task_queued', {'task': task.name, 'priority': task.priority, 'run_id': run_id})
+            return {'status': 'queued', 'run_id': run_id}
+
+        with self._lock:
+            if task.name in self.running_tasks or task.name in self.queued_runs:
+                logger.warning(f"Task {task.name} is already running or queued")
+                return {'status': 'skipped', 'error': 'Task is already running or queued'}
+            run_id = self.db.log_run_start(task.name, status='queued', scheduled_at=scheduled_at)
+            self.queued_runs[task.name] = run_id
+
+        if not self.queue.submit(task.name, lambda: self.run_task(task, run_id), task.priority,
+                                 meta={'run_id': run_id}):
+            self._drop_queued(task.name)
+            return {'status': 'skipped', 'error': 'Task is already running or queued'}
+        return {'status': 'queued', 'run_id': run_id}
+
+    def _drop_queued(self, task_name: str, run_id: Optional[int] = None):
+        """Forget a queued run that will never start, including its runs row"""
+        with self._lock:
+            if run_id is None or self.queued_runs.get(task_name) == run_id:
+                run_id = self.queued_runs.pop(task_name, run_id)
+        if run_id is not None:
+            self.db.delete_run(run_id)
+
+    def _watch_broker(self):
+        """Turn broker changes into task events and fail runs of lost agents"""
+        claimed: Dict[int, Dict] = {}
+        while not self._broker_stop.wait(AGENT_POLL_INTERVAL):
+            try:
+                for entry in self.broker.stale(AGENT_TIMEOUT):
+                    run = self.db.get_run_detail(entry['run_id'])
+                    if run and run['status'] in ('queued', 'running'):
+                        duration = (datetime.now() - datetime.fromisoformat(run['started_at'])).total_seconds()
+                        self.db.log_run_end(entry['run_id'], 'error', -1, '',
+                                            f"Worker {entry['claimed_by']} stopped responding", duration)
+                        self.db.update_task_state(entry['task_name'], 'error')
+                    self.broker.finish(entry['run_id'])
+                    logger.warning(f"Run {entry['run_id']} lost with worker {entry['claimed_by']}")
+
+                current = {e['run_id']: e for e in self.broker.entries() if e['claimed_by']}
+            except Exception:
+                logger.exception("Watching the run broker failed")
+                continue
+
+            for run_id, entry in current.items():
+                if run_id not in claimed:
+                    started = {'task': entry['task_name'], 'run_id': run_id, 'worker': entry['claimed_by']}
+                    if entry['heartbeat_at']:
+                        enqueued = datetime.fromisoformat(entry['enqueued_at']).timestamp()
+                        started['wait'] = round(max(0.0, entry['heartbeat_at'] - enqueued), 3)
+                        self._broker_waits.append(started['wait'])
+                    self._notify('task_started', started)
+            for run_id, entry in claimed.items():
+                if run_id not in current:
+                    run = self.db.get_run_detail(run_id) or {}
+                    self._notify('task_finished', {
+                        'task': entry['task_name'], 'run_id': run_id, 'status': run.get('status'),
+                        'exit_code': run.get('exit_code'), 'duration': run.get('duration_seconds')
+                    })
+            claimed = current
+
+    def cancel(self, task_name: str) -> bool:
+        """Remove the task's waiting run from the queue"""
+        if self.broker:
+            return any([self.cancel_run(e['run_id']) for e in self.broker.entries()
+                        if e['task_name'] == task_name and not e['claimed_by']])
+        cancelled = self.queue.cancel(task_name)
+        if cancelled:
+            self._drop_queued(task_name)
+        return cancelled
+
+    def cancel_run(self, run_id: int) -> bool:
+        """Cancel a queued run by its run_id"""
+        if self.broker:
+            if not self.broker.cancel(run_id):
+                return False
+            self.db.delete_run(run_id)
+            self._notify('task_dequeued', {'run_id': run_id, 'cancelled': True})
+            return True
+        with self._lock:
+            task_name = next((name for name, queued in self.queued_runs.items() if queued == run_id), None)
+        return task_name is not None and self.cancel(task_name)
+
+    def recover(self) -> int:
+        """Close runs a killed scheduler process left queued or running
+
+        Queued runs are dropped like on a regular shutdown; runs that were
+        executing are failed. Runs a database broker still holds belong to
+        worker agents and are left alone.
+        """
+        held = {e['run_id'] for e in self.broker.entries()} if self.broker else set()
+        leftover = [run for run in self.db.get_unfinished_runs() if run['id'] not in held]
+        for run in leftover:
+            if run['status'] == 'queued':
+                self.db.delete_run(run['id'])
+                continue
+            duration = (datetime.now() - datetime.fromisoformat(run['started_at'])).total_seconds()
+            self.db.log_run_end(run['id'], 'error', -1, '',
+                                'Interrupted: the scheduler stopped while the bot was running', duration)
+            self.db.update_task_state(run['task_name'], 'error')
+        if leftover:
+            logger.warning(f"Closed {len(leftover)} runs left over by a previous scheduler process")
+        return len(leftover)
+
+    def close(self):
+        self._broker_stop.set()
+        self.queue.close()
+        with self._lock:
+            pending = list(self.queued_runs)
+        for task_name in pending:
+            self._drop_queued(task_name)
+        if self.warm_pool:
+            self.warm_pool.close()
+
+    @staticmethod
+    def _wait(process, timeout: Optional[float]) -> tuple:
+        """Wait for a bot process; returns (exit code, struct rusage or None)"""
+        if isinstance(process, WarmProcess):
+            return process.wait(timeout), process.rusage
+
+        # Reap with wait4() rather than Popen.wait() to get the child's resource usage
+        try:
+            if timeout is None:
+                _, status, usage = os.wait4(process.pid, 0)
+            else:
+                deadline = time.monotonic() + timeout
+                delay = 0.0005
+                while True:
+                    pid, status, usage = os.wait4(process.pid, os.WNOHANG)
+                    if pid:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise subprocess.TimeoutExpired(process.args, timeout)
+                    time.sleep(min(delay, remaining, 0.05))
+                    delay *= 2
+        except ChildProcessError:
+            # Already reaped by Popen itself: the exit code is known, the usage is lost
+            return process.returncode, None
+        process.returncode = os.waitstatus_to_exitcode(status)
+        return process.returncode, usage
+
+    @staticmethod
+    def _pump(pipe, buffer: OutputBuffer, log_file, log_lock: threading.Lock, stop: threading.Event):
+        """Copy a pipe into its buffer and the run log until EOF or until stop is set"""
+        fd = pipe.fileno()
+        try:
+            while not stop.is_set():
+                if not select.select([fd], [], [], 0.1)[0]:
+                    continue
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    break
+                buffer.write(chunk)
+                with log_lock:
+                    log_file.write(chunk)
+                    log_file.flush()
+        finally:
+            pipe.close()
+
+    def run_task(self, task: TaskConfig, run_id: Optional[int] = None,
+                 scheduled_at: Optional[datetime] = None) -> Dict:
+        """Execute a task and log the result
+
+        run_id is the queued runs row created by submit(); without one a new
+        row is started for the fire time scheduled_at.
+        """
         script_path = os.path.join(self.bots_path, task.script)
 
         if not os.path.exists(script_path):
             logger.error(f"Script not found: {script_path}")
+            if run_id is not None:
+                self._drop_queued(task.name, run_id)
             return {'status': 'error', 'error': f'Script not found: {task.script}'}
 
         with self._lock:
             if task.name in self.running_tasks:
                 logger.warning(f"Task {task.name} is already running")
-                return {'status': 'skipped', 'error': 'Task is already running'}
+                skipped = True
+            else:
+                skipped = False
+                # Claim the task so it never looks idle between queued and running
+                self.running_tasks[task.name] = None
+        if skipped:
+            if run_id is not None:
+                self._drop_queued(task.name, run_id)
+            return {'status': 'skipped', 'error': 'Task is already running'}
 
-        run_id = self.db.log_run_start(task.name)
+        try:
+            if run_id is None:
+                run_id = self.db.log_run_start(task.name, scheduled_at=scheduled_at)
+            else:
+                self.db.mark_run_started(run_id)
+        except Exception:
+            with self._lock:
+                self.running_tasks.pop(task.name, None)
+            raise
         start_time = datetime.now()
+        status, exit_code, duration = 'error', -1, 0.0
 
         logger.info(f"Starting task: {task.name} ({task.script})")
 
+        with self._lock:
+            self.active_runs[run_id] = task.name
+            if self.queued_runs.get(task.name) == run_id:
+                del self.queued_runs[task.name]
+        log_file = None
+        readers: List[threading.Thread] = []
+        stop_readers = threading.Event()
+
         try:
             env = os.environ.copy()
             env.update(task.env or {})
             env['TASK_NAME'] = task.name
             env['TASK_RUN_ID'] = str(run_id)
 
-            process = subprocess.Popen(
-                [sys.executable, script_path],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                env=env,
-                cwd=os.path.dirname(script_path) or self.bots_path
-            )
+            log_file = open(self.log_path(run_id), 'wb')
+            log_lock = threading.Lock()
+            stdout, stderr = OutputBuffer(), OutputBuffer()
+
+            process = self._spawn(task, script_path, env)
+
+            readers = [
+                threading.Thread(target=self._pump, args=(pipe, buffer, log_file, log_lock, stop_readers),
+                                 daemon=True)
+                for pipe, buffer in ((process.stdout, stdout), (process.stderr, stderr))
+            ]
+            for reader in readers:
+                reader.start()
 
             with self._lock:
                 self.running_tasks[task.name] = process
+            self._notify('task_started', {'task': task.name, 'run_id': run_id})
 
+            timed_out = False
             try:
-                stdout, stderr = process.communicate(timeout=task.timeout)
-                exit_code = process.returncode
+                exit_code, usage = self._wait(process, task.timeout)
             except subprocess.TimeoutExpired:
-                process.kill()
-                stdout, stderr = process.communicate()
+                if isinstance(process, WarmProcess):
+                    process.kill()
+                else:
+                    # Not Popen.kill(): its poll() could reap the child before wait4() does
+                    os.kill(process.pid, signal.SIGKILL)
+                _, usage = self._wait(process, None)
                 exit_code = -1
-                stderr = f'Timeout after {task.timeout} seconds'.encode()
+                timed_out = True
+            if usage is not None:
+                usage = {column: getattr(usage, field) for column, field, _ in RUSAGE_COLUMNS}
+
+            # Grandchildren may still hold the pipes open; don't wait on them forever
+            deadline = time.monotonic() + 5
+            for reader in readers:
+                reader.join(timeout=max(0.0, deadline - time.monotonic()))
+            abandoned = any(reader.is_alive() for reader in readers)
+            stop_readers.set()
+            for reader in readers:
+                reader.join()
+
+            output = stdout.text()
+            if abandoned:
+                logger.warning(f"Task {task.name}: background processes still hold its output open, "
+                               "their further output is not captured")
+                output += '\n... [output of background processes not captured] ...\n'
+            error = f'Timeout after {task.timeout} seconds' if timed_out else stderr.text()
 
             duration = (datetime.now() - start_time).total_seconds()
             status = 'success' if exit_code == 0 else 'error'
+            exceeded = None if timed_out else self._limit_exceeded(task, exit_code, usage, error)
+            if exceeded:
+                status = 'limit_exceeded'
+                error = f'{exceeded}\n{error}'
 
-            self.db.log_run_end(
-                run_id, status, exit_code,
-                stdout.decode('utf-8', errors='replace'),
-                stderr.decode('utf-8', errors='replace'),
-                duration
-            )
+            self.db.log_run_end(run_id, status, exit_code, output, error, duration, usage)
             self.db.update_task_state(task.name, status)
 
             logger.info(f"Task {task.name} finished: {status} (Exit: {exit_code}, Duration: {duration:.1f}s)")
@@ -348,11 +2055,13 @@ class TaskRunner:
                 'status': status,
                 'exit_code': exit_code,
                 'duration': duration,
-                'output': stdout.decode('utf-8', errors='replace')[-2000:],
-                'error': stderr.decode('utf-8', errors='replace')[-2000:]
+                'usage': usage,
+                'output': output[-2000:],
+                'error': error[-2000:]
             }
 
         except Exception as e:
+            status = 'error'
             duration = (datetime.now() - start_time).total_seconds()
             self.db.log_run_end(run_id, 'error', -1, '', str(e), duration)
             self.db.update_task_state(task.name, 'error')
@@ -360,109 +2069,558 @@ class TaskRunner:
             return {'status': 'error', 'error': str(e)}
 
         finally:
+            # Readers write to the log until they stop
+            stop_readers.set()
+            for reader in readers:
+                reader.join()
+            if log_file:
+                log_file.close()
+                try:
+                    os.remove(self.log_path(run_id))
+                except FileNotFoundError:
+                    pass
             with self._lock:
                 self.running_tasks.pop(task.name, None)
+                self.active_runs.pop(run_id, None)
+            self._notify('task_finished', {
+                'task': task.name, 'run_id': run_id, 'status': status,
+                'exit_code': exit_code, 'duration': duration
+            })
 
     def is_running(self, task_name: str) -> bool:
         with self._lock:
             return task_name in self.running_tasks
 
+    def running_snapshot(self) -> set:
+        """Names of all running tasks, taken under a single lock"""
+        with self._lock:
+            running = set(self.running_tasks)
+        if self.broker:
+            running |= {e['task_name'] for e in self.broker.entries() if e['claimed_by']}
+        return running
+
+    def queue_snapshot(self) -> Dict:
+        """Queue depth, wait times and waiting runs, from the broker if there is one"""
+        if not self.broker:
+            return self.queue.snapshot()
+
+        entries = self.broker.entries()
+        waiting = [e for e in entries if not e['claimed_by']]
+        waits = list(self._broker_waits)
+        return {
+            'depth': len(waiting),
+            'active': len(entries) - len(waiting),
+            'max_concurrent': None,  # Sum of the agents' slots
+            'avg_wait': round(sum(waits) / len(waits), 3) if waits else 0,
+            'max_wait': round(max(waits), 3) if waits else 0,
+            'waiting': [
+                {'task': e['task_name'], 'position': i + 1, 'priority': e['priority'],
+                 'queued_at': e['enqueued_at'], 'run_id': e['run_id']}
+                for i, e in enumerate(waiting)
+            ]
+        }
+
 
 # ==================================================
 # Task Manager
 # ==================================================
 
+class ConfigWatcher:
+    """Calls `on_change` when the config file changes on disk
+
+    Watches the file's directory with inotify, so editors and tools that
+    write a temp file and rename it are caught too, and falls back to
+    polling the file's stat. Bursts of writes are coalesced: the callback
+    runs once the file has been quiet for `debounce` seconds.
+    """
+
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+    def __init__(self, path: str, on_change: Callable[[], None], mode: str = CONFIG_WATCH,
+                 debounce: float = CONFIG_WATCH_DEBOUNCE, poll_interval: float = 0.5):
+        self.path = os.path.abspath(path)
+        self.on_change = on_change
+        self.mode = mode
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self.mode == 'off':
+            return
+        fd = self._inotify_open() if self.mode in ('auto', 'inotify') else None
+        if fd is None and self.mode == 'inotify':
+            logger.warning("inotify unavailable, polling the config file instead")
+        target, args = (self._watch_inotify, (fd,)) if fd is not None else (self._watch_poll, ())
+        self._thread = threading.Thread(target=target, args=args, name='config-watcher', daemon=True)
+        self._thread.start()
+        logger.info(f"Watching {self.path} ({'inotify' if fd is not None else 'polling'})")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def _inotify_open(self) -> Optional[int]:
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            return None
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            return None
+        fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if fd < 0:
+            return None
+        mask = (self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_FROM |
+                self.IN_MOVED_TO | self.IN_CREATE | self.IN_DELETE)
+        if libc.inotify_add_watch(fd, os.path.dirname(self.path).encode(), mask) < 0:
+            os.close(fd)
+            return None
+        return fd
+
+    def _fire(self):
+        try:
+            self.on_change()
+        except Exception:
+            logger.exception(f"Reloading {self.path} failed")
+
+    def _watch_inotify(self, fd: int):
+        name = os.path.basename(self.path).encode()
+        deadline = None
+        try:
+            while not self._stop.is_set():
+                timeout = 1.0 if deadline is None else max(0.0, deadline - time.monotonic())
+                ready, _, _ = select.select([fd], [], [], timeout)
+                if ready:
+                    try:
+                        data = os.read(fd, 65536)
+                    except BlockingIOError:
+                        continue
+                    offset = 0
+                    while offset < len(data):
+                        _, _, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+                        offset += self.EVENT_HEADER.size
+                        if data[offset:offset + length].rstrip(b'\0') == name:
+                            deadline = time.monotonic() + self.debounce
+                        offset += length
+                elif deadline is not None and time.monotonic() >= deadline:
+                    deadline = None
+                    self._fire()
+        finally:
+            os.close(fd)
+
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _watch_poll(self):
+        last = self._signature()
+        deadline = None
+        while not self._stop.wait(self.poll_interval if deadline is None else
+                                  max(0.0, min(self.poll_interval, deadline - time.monotonic()))):
+            current = self._signature()
+            if current != last:
+                last = current
+                deadline = time.monotonic() + self.debounce
+            elif deadline is not None and time.monotonic() >= deadline:
+                deadline = None
+                self._fire()
+
+
+class RunPruner:
+    """Enforces the run history retention policy in the background
+
+    Runs older than `max_age_days`, beyond the newest `max_per_task` of
+    their task, or the oldest ones while the database is larger than
+    `max_mb` are deleted in batches of `batch_size`, each in its own short
+    transaction, then the freed pages are returned to the filesystem with
+    incremental vacuum. A limit of 0 disables that rule.
+    """
+
+    def __init__(self, db: Database, runner: Optional['TaskRunner'] = None,
+                 on_change: Optional[Callable[[str, Dict], None]] = None,
+                 max_age_days: int = RUN_RETENTION_DAYS, max_per_task: int = RUN_RETENTION_PER_TASK,
+                 max_mb: int = RUN_RETENTION_MB, interval: float = RETENTION_INTERVAL,
+                 batch_size: int = RETENTION_BATCH):
+        self.db = db
+        self.runner = runner
+        self.on_change = on_change
+        self.max_age_days = max_age_days
+        self.max_per_task = max_per_task
+        self.max_mb = max_mb
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_age_days or self.max_per_task or self.max_mb)
+
+    def start(self):
+        if not self.enabled:
+            return
+        self._thread = threading.Thread(target=self._loop, name='run-pruner', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.prune()
+            except Exception:
+                logger.exception("Pruning the run history failed")
+            self._stop.wait(self.interval)
+
+    def _next_batch(self) -> List[int]:
+        if self.max_age_days:
+            cutoff = (datetime.now() - timedelta(days=self.max_age_days)).isoformat()
+            run_ids = self.db.get_runs_before(cutoff, self.batch_size)
+            if run_ids:
+                return run_ids
+        if self.max_per_task:
+            run_ids = self.db.get_runs_beyond(self.max_per_task, self.batch_size)
+            if run_ids:
+                return run_ids
+        if self.max_mb and self.db.used_bytes() > self.max_mb * 1024 * 1024:
+            return self.db.get_runs_before(datetime.now().isoformat(), self.batch_size)
+        return []
+
+    def prune(self) -> int:
+        """Apply the policy once; returns the number of runs deleted"""
+        deleted = 0
+        while not self._stop.is_set():
+            run_ids = self._next_batch()
+            if not run_ids:
+                break
+            self.db.prune_runs(run_ids)
+            if self.runner:
+                self.runner.delete_logs(run_ids)
+            deleted += len(run_ids)
+            self._stop.wait(0.05)  # Let other writers in between batches
+
+        if self.db.enable_incremental_vacuum():
+            free = None
+            while not self._stop.is_set():
+                left = self.db.incremental_vacuum(self.batch_size * 4)
+                if not left or (free is not None and left >= free):
+                    break
+                free = left
+                self._stop.wait(0.05)
+
+        if deleted:
+            logger.info(f"Pruned {deleted} runs from the run history")
+            if self.on_change:
+                self.on_change('runs_pruned', {'count': deleted})
+        return deleted
+
+
+def schedule_offset(task_name: str, window: int) -> int:
+    """Stable offset in [0, window) seconds derived from the task name"""
+    if window <= 0:
+        return 0
+    return int.from_bytes(hashlib.sha256(task_name.encode()).digest()[:8], 'big') % window
+
+
+class OffsetTrigger(BaseTrigger):
+    """Fires `offset` seconds after every fire time of another trigger
+
+    Used to spread cron tasks that share a schedule like `0 8 * * *` over a
+    window instead of starting them all in the same second.
+    """
+
+    def __init__(self, trigger: BaseTrigger, offset: int, jitter: Optional[int] = None):
+        self.trigger = trigger
+        self.offset = offset
+        self.jitter = jitter
+
+    def get_next_fire_time(self, previous_fire_time, now):
+        delta = timedelta(seconds=self.offset)
+        previous = previous_fire_time - delta if previous_fire_time else None
+        next_time = self.trigger.get_next_fire_time(previous, now - delta)
+        if next_time is None:
+            return None
+        return self._apply_jitter(next_time + delta, self.jitter, now)
+
+    def __str__(self):
+        return f"{self.trigger} +{self.offset}s"
+
+
+# Fire time of the scheduler job running on this thread, set by DispatchPool
+_dispatch = threading.local()
+
+
+class DispatchPool(ThreadPoolExecutor):
+    """Scheduler thread pool that tells each job the fire time it runs for"""
+
+    def submit(self, fn, *args, **kwargs):
+        run_times = args[2]  # apscheduler run_job(job, jobstore_alias, run_times, logger_name)
+
+        def dispatch():
+            _dispatch.scheduled_at = run_times[-1]
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _dispatch.scheduled_at = None
+        return super().submit(dispatch)
+
+
+class DispatchExecutor(BasePoolExecutor):
+    """APScheduler executor running jobs on a DispatchPool"""
+
+    def __init__(self, max_workers: int = SCHEDULER_WORKERS):
+        super().__init__(DispatchPool(max_workers))
+
+
+def run_scheduled_task(task_name: str):
+    """Scheduler job entry point
+
+    Jobs live in a persistent job store, so they reference this importable
+    function (as SCHEDULED_TASK_REF) and the task name rather than a bound
+    method and a TaskConfig.
+    """
+    manager = TaskManager.active
+    if manager and task_name in manager.tasks:
+        scheduled_at = getattr(_dispatch, 'scheduled_at', None)
+        if scheduled_at:
+            scheduled_at = scheduled_at.astimezone().replace(tzinfo=None)  # Local time like started_at
+            SCHEDULER_LAG.observe(max(0.0, (datetime.now() - scheduled_at).total_seconds()))
+        manager.runner.submit(manager.tasks[task_name], scheduled_at=scheduled_at)
+
+
+# Stable under both `python app.py` and WSGI servers: main() registers this
+# module as `app`, so restoring a job never imports the module a second time
+SCHEDULED_TASK_REF = 'app:run_scheduled_task'
+
+
 class TaskManager:
     """Main task manager with scheduling"""
 
-    def __init__(self, config_path: str, bots_path: str, db: Database):
+    active: Optional['TaskManager'] = None  # Instance that scheduled jobs run against
+
+    def __init__(self, config_path: str, bots_path: str, db: Database,
+                 exec_mode: str = EXEC_MODE, max_concurrent: int = MAX_CONCURRENT_RUNS,
+                 run_broker: str = RUN_BROKER):
         self.config_path = config_path
         self.bots_path = bots_path
         self.db = db
-        self.runner = TaskRunner(db, bots_path)
-        self.scheduler = BackgroundScheduler()
+        self.events = EventBus()
+
+        # With a broker, runs are executed by worker agents. The local broker
+        # is served by an agent in this process.
+        broker = {'database': DatabaseBroker, 'local': lambda db: LocalBroker()}.get(run_broker)
+        broker = broker(db) if broker else None
+        self.runner = TaskRunner(db, bots_path, on_change=self.notify, exec_mode=exec_mode,
+                                 max_concurrent=max_concurrent, broker=broker)
+        self.agent = None
+        if isinstance(broker, LocalBroker):
+            self.agent = WorkerAgent(broker, TaskRunner(db, bots_path, exec_mode=exec_mode), max_concurrent)
+        self.scheduler = BackgroundScheduler(
+            jobstores={'default': SQLiteJobStore(db)},
+            executors={'default': DispatchExecutor()}
+        )
+        self.scheduler.add_listener(self._on_job_skipped, EVENT_JOB_MAX_INSTANCES | EVENT_JOB_MISSED)
         self.tasks: Dict[str, TaskConfig] = {}
+        self.config_digest: Optional[str] = None  # sha256 of the loaded tasks.yaml
+        self.version = 0
+        self._version_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self.watcher = ConfigWatcher(config_path, self.reload_if_changed)
+        self.pruner = RunPruner(db, self.runner, on_change=self.notify)
         self._load_config()
+        TaskManager.active = self
+
+    def notify(self, event: str, data: Optional[Dict] = None):
+        """Record a state change: bump the version status caches key on and
+        publish the event to /api/events subscribers"""
+        data = data or {}
+        with self._version_lock:
+            self.version += 1
+            version = self.version
+        self.events.publish(event, data, version)
+
+        if event == 'task_finished':
+            RUNS.labels(data['task'], data['status']).inc()
+            if data.get('duration') is not None:
+                RUN_DURATION.labels(data['task']).observe(data['duration'])
+        elif 'wait' in data:
+            # task_dequeued from the local queue, task_started from a broker
+            RUN_QUEUE_WAIT.observe(data['wait'])
+
+    def _on_job_skipped(self, event):
+        # The job's next_run_time moved without run_task being called
+        self.notify('job_skipped', {'job': event.job_id})
+
+    def _config_digest(self) -> Optional[str]:
+        try:
+            with open(self.config_path, 'rb') as f:
+                return hashlib.sha256(f.read()).hexdigest()
+        except FileNotFoundError:
+            return None
 
-    def _load_config(self):
-        """Load task configuration from YAML"""
+    def _read_config(self) -> Dict[str, TaskConfig]:
+        """Parse the task configuration YAML"""
         if not os.path.exists(self.config_path):
             logger.warning(f"Config file not found: {self.config_path}")
-            return
+            self.config_digest = None
+            return {}
 
-        with open(self.config_path, 'r') as f:
-            config = yaml.safe_load(f) or {}
+        with open(self.config_path, 'rb') as f:
+            content = f.read()
+        config = yaml.safe_load(content) or {}
 
+        tasks = {}
         for task_data in config.get('tasks', []):
-            task = TaskConfig(**task_data)
-            self.tasks[task.name] = task
-            logger.info(f"Task loaded: {task.name}")
+            task = TaskConfig.from_dict(task_data)
+            tasks[task.name] = task
+        self.config_digest = hashlib.sha256(content).hexdigest()
+        return tasks
+
+    def _load_config(self):
+        """Load task configuration from YAML"""
+        self.tasks = self._read_config()
+        for name in self.tasks:
+            logger.info(f"Task loaded: {name}")
 
     def reload_config(self):
-        """Reload configuration"""
-        self.scheduler.remove_all_jobs()
-        self.tasks.clear()
-        self._load_config()
-        self._schedule_tasks()
-        logger.info("Configuration reloaded")
+        """Reload configuration, touching only the jobs of added, removed
+        and changed tasks so unchanged jobs keep their next run time"""
+        with self._reload_lock:
+            self._reload_config()
+
+    def reload_if_changed(self):
+        """Reload unless the file still has the content loaded last"""
+        if self._config_digest() != self.config_digest:
+            self.reload_config()
+
+    def _reload_config(self):
+        old_tasks = self.tasks
+        new_tasks = self._read_config()
+        states = self.db.get_all_task_states()
+
+        added = [name for name in new_tasks if name not in old_tasks]
+        removed = [name for name in old_tasks if name not in new_tasks]
+        changed = [
+            name for name in new_tasks
+            if name in old_tasks and new_tasks[name] != old_tasks[name]
+        ]
+        self.tasks = new_tasks
+
+        for name in removed:
+            job_id = f"task_{name}"
+            if self.scheduler.get_job(job_id):
+                self.scheduler.remove_job(job_id)
+
+        for name in added + changed:
+            task = new_tasks[name]
+            job_id = f"task_{name}"
+            if self._should_schedule(task, states):
+                self._schedule_task(task)
+            elif self.scheduler.get_job(job_id):
+                self.scheduler.remove_job(job_id)
+
+        self.notify('config_reloaded', {
+            'tasks': list(self.tasks), 'added': added, 'removed': removed, 'changed': changed
+        })
+        logger.info(f"Configuration reloaded: {len(added)} added, {len(removed)} removed, "
+                    f"{len(changed)} changed")
+
+    @staticmethod
+    def _should_schedule(task: TaskConfig, states: Dict[str, Dict]) -> bool:
+        """Enabled in the config and not disabled from the UI"""
+        if not task.enabled:
+            return False
+        state = states.get(task.name)
+        return not (state and not state.get('enabled', True))
 
     def _schedule_tasks(self):
-        """Schedule all enabled tasks"""
+        """Schedule all enabled tasks and drop stored jobs of all others"""
+        states = self.db.get_all_task_states()
+        scheduled = set()
         for task in self.tasks.values():
-            if not task.enabled:
-                continue
+            if self._should_schedule(task, states):
+                self._schedule_task(task)
+                scheduled.add(f"task_{task.name}")
 
-            state = self.db.get_task_state(task.name)
-            if state and not state.get('enabled', True):
-                continue
-
-            self._schedule_task(task)
+        for job in self.scheduler.get_jobs():
+            if job.id not in scheduled:
+                self.scheduler.remove_job(job.id)
 
     def _schedule_task(self, task: TaskConfig):
-        """Schedule a single task"""
-        job_id = f"task_{task.name}"
+        """Schedule a single task
 
-        if self.scheduler.get_job(job_id):
-            self.scheduler.remove_job(job_id)
+        A stored job with the same trigger is kept, so its next run time
+        survives reloads and restarts; only its misfire options are updated.
+        """
+        job_id = f"task_{task.name}"
+        job = self.scheduler.get_job(job_id)
 
         if task.schedule:
             trigger = CronTrigger.from_crontab(task.schedule)
-            logger.info(f"Task {task.name} scheduled with cron: {task.schedule}")
+            spread = task.spread if task.spread is not None else SCHEDULE_SPREAD
+            offset = schedule_offset(task.name, spread)
+            if offset:
+                trigger = OffsetTrigger(trigger, offset, task.jitter)
+            else:
+                trigger.jitter = task.jitter
         elif task.interval:
-            trigger = IntervalTrigger(seconds=task.interval)
-            logger.info(f"Task {task.name} scheduled every {task.interval}s")
+            trigger = IntervalTrigger(seconds=task.interval, jitter=task.jitter)
         else:
             logger.warning(f"Task {task.name} has no schedule")
+            if job:
+                self.scheduler.remove_job(job_id)
+            return
+
+        options = {
+            'misfire_grace_time': task.misfire_grace_time,
+            # Missed fires collapse into one run and a task never overlaps
+            # itself: runs are tracked per task, not per scheduler instance
+            'coalesce': True,
+            'max_instances': 1
+        }
+        same_trigger = job and (str(job.trigger), job.trigger.jitter) == (str(trigger), trigger.jitter)
+        if same_trigger and job.func_ref == SCHEDULED_TASK_REF:
+            if any(getattr(job, key) != value for key, value in options.items()):
+                self.scheduler.modify_job(job_id, **options)
             return
 
         self.scheduler.add_job(
-            self.runner.run_task,
+            SCHEDULED_TASK_REF,
             trigger=trigger,
-            args=[task],
+            args=[task.name],
             id=job_id,
             name=task.name,
-            replace_existing=True
+            replace_existing=True,
+            **options
         )
+        if task.schedule:
+            logger.info(f"Task {task.name} scheduled with cron: {task.schedule}"
+                        + (f" (+{trigger.offset}s)" if isinstance(trigger, OffsetTrigger) else ''))
+        else:
+            logger.info(f"Task {task.name} scheduled every {task.interval}s")
 
     def run_task_now(self, task_name: str) -> Dict:
-        """Run a task immediately"""
+        """Queue a task to run immediately; returns its run_id without waiting"""
         if task_name not in self.tasks:
             return {'status': 'error', 'error': 'Task not found'}
 
-        task = self.tasks[task_name]
-
-        result = {'status': 'pending'}
-        def run():
-            nonlocal result
-            result = self.runner.run_task(task)
-
-        thread = threading.Thread(target=run)
-        thread.start()
-        thread.join(timeout=1)
-
-        if thread.is_alive():
-            return {'status': 'started', 'message': 'Task started'}
-        return result
+        return self.runner.submit(self.tasks[task_name])
 
     def enable_task(self, task_name: str, enabled: bool):
         """Enable or disable a task"""
@@ -478,14 +2636,21 @@ class TaskManager:
             if self.scheduler.get_job(job_id):
                 self.scheduler.remove_job(job_id)
 
+        self.notify('task_enabled', {'task': task_name, 'enabled': enabled})
         return True
 
     def get_status(self) -> Dict:
         """Get current status"""
+        states = self.db.get_all_task_states()
+        running = self.runner.running_snapshot()
+        run_queue = self.runner.queue_snapshot()
+        queued = {entry['task']: entry for entry in run_queue['waiting']}
+        jobs = {job.id: job for job in self.scheduler.get_jobs()}
+
         tasks_status = []
         for task in self.tasks.values():
-            state = self.db.get_task_state(task.name) or {}
-            job = self.scheduler.get_job(f"task_{task.name}")
+            state = states.get(task.name, {})
+            job = jobs.get(f"task_{task.name}")
 
             tasks_status.append({
                 'name': task.name,
@@ -494,7 +2659,10 @@ class TaskManager:
                 'enabled': state.get('enabled', task.enabled),
                 'schedule': task.schedule,
                 'interval': task.interval,
-                'running': self.runner.is_running(task.name),
+                'running': task.name in running,
+                'queued': task.name in queued,
+                'queue_position': queued[task.name]['position'] if task.name in queued else None,
+                'priority': task.priority,
                 'last_run': state.get('last_run'),
                 'last_status': state.get('last_status'),
                 'run_count': state.get('run_count', 0),
@@ -505,18 +2673,34 @@ class TaskManager:
         return {
             'tasks': tasks_status,
             'stats': self.db.get_stats(),
+            'queue': run_queue,
+            'scheduler_lag': self.db.get_lag_stats(),
             'scheduler_running': self.scheduler.running
         }
 
     def start(self):
         """Start the scheduler"""
+        self.runner.recover()
+        # Reconcile the stored jobs with the config before missed runs are processed
+        self.scheduler.start(paused=True)
         self._schedule_tasks()
-        self.scheduler.start()
+        self.scheduler.resume()
+        if self.agent:
+            self.agent.start()
+        self.watcher.start()
+        self.pruner.start()
         logger.info("Task Manager started")
 
     def stop(self):
         """Stop the scheduler"""
+        if not self.scheduler.running:
+            return
+        self.watcher.stop()
+        self.pruner.stop()
         self.scheduler.shutdown()
+        if self.agent:
+            self.agent.stop()
+        self.runner.close()
         logger.info("Task Manager stopped")
 
 
@@ -527,6 +2711,18 @@ class TaskManager:
 class BotGenerator:
     """Generates bot code from configuration"""
 
+    @staticmethod
+    def collect_limits(config: dict) -> tuple:
+        """(workers, per host) of the collection stage; cleared or invalid wizard fields fall back to the defaults"""
+        concurrency = config.get('professional', {}).get('concurrency') or {}
+        limits = []
+        for key, default in (('workers', 8), ('perHost', 4)):
+            try:
+                limits.append(max(1, int(concurrency.get(key) or default)))
+            except (TypeError, ValueError):
+                limits.append(default)
+        return tuple(limits)
+
     @staticmethod
     def generate_dockerfile(config: dict) -> str:
         deps = ['requests', 'beautifulsoup4', 'feedparser', 'python-dateutil']
@@ -693,6 +2889,7 @@ PUSHOVER_API_TOKEN={p.get('apiToken', '')}
 '''
 
         # Professional options
+        collect_workers, collect_per_host = BotGenerator.collect_limits(config)
         env += f'''
 # Professional Options
 LOG_LEVEL={pro.get('logLevel', 'INFO')}
@@ -702,6 +2899,8 @@ DASHBOARD_USERNAME={pro.get('dashboard', {}).get('username', 'admin')}
 DASHBOARD_PASSWORD={pro.get('dashboard', {}).get('password', '')}
 RETRY_ENABLED={str(pro.get('retry', {}).get('enabled', True)).lower()}
 DRY_RUN={str(pro.get('dryRun', False)).lower()}
+COLLECT_WORKERS={collect_workers}
+COLLECT_PER_HOST={collect_per_host}
 '''
         return env
 
@@ -714,6 +2913,7 @@ DRY_RUN={str(pro.get('dryRun', False)).lower()}
         proc = config.get('processing', {})
         out = config.get('outputs', {})
         pro = config.get('professional', {})
+        collect_workers, collect_per_host = BotGenerator.collect_limits(config)
 
         # Build imports
         imports = '''#!/usr/bin/env python3
@@ -728,14 +2928,20 @@ import json
 import sqlite3
 import hashlib
 import logging
+import math
+import mmap
+import struct
 import time
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Any, Optional
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 '''.format(bot_name=bot_name, description=description)
 
@@ -766,6 +2972,8 @@ DRY_RUN = os.getenv('DRY_RUN', 'false').lower() == 'true'
 RETRY_ENABLED = os.getenv('RETRY_ENABLED', 'true').lower() == 'true'
 RETRY_MAX = int(os.getenv('RETRY_MAX_ATTEMPTS', '3'))
 REQUEST_TIMEOUT = int(os.getenv('REQUEST_TIMEOUT', '30'))
+COLLECT_WORKERS = int(os.getenv('COLLECT_WORKERS', '{collect_workers}'))  # Parallel requests in total
+COLLECT_PER_HOST = int(os.getenv('COLLECT_PER_HOST', '{collect_per_host}'))  # Parallel requests per host
 
 # Data directory
 DATA_DIR = Path(os.getenv('DATA_DIR', '/app/data'))
@@ -803,43 +3011,215 @@ def init_db():
             items_sent INTEGER,
             error TEXT
         );
+        CREATE TABLE IF NOT EXISTS http_cache (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            body TEXT,
+            fetched_at TEXT
+        );
     """)
     conn.commit()
     conn.close()
 
-def is_already_sent(item_hash: str) -> bool:
-    """Check if item was already sent"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.execute("SELECT 1 FROM sent_items WHERE item_hash = ?", (item_hash,))
-    result = cursor.fetchone() is not None
-    conn.close()
-    return result
-
-def mark_as_sent(item_hash: str, item_type: str, title: str):
-    """Mark item as sent"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute(
-        "INSERT OR IGNORE INTO sent_items (item_hash, sent_at, item_type, title) VALUES (?, ?, ?, ?)",
-        (item_hash, datetime.now().isoformat(), item_type, title[:200])
-    )
-    conn.commit()
-    conn.close()
+_db = None
+
+def get_db() -> sqlite3.Connection:
+    """Connection reused for the whole run (main thread only)"""
+    global _db
+    if _db is None:
+        _db = sqlite3.connect(DB_PATH)
+    return _db
+
+def filter_unsent(items: List[Dict]) -> List[Dict]:
+    """Drop items that were already sent; only Bloom filter hits are looked up in sent_items"""
+    hashes = [get_item_hash(item) for item in items]
+    sent_filter = get_sent_filter()
+    maybe_sent = [h for h in hashes if bloom_contains(sent_filter, h)]
+    sent = set()
+    if maybe_sent:
+        conn = get_db()
+        with conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS candidates (item_hash TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM candidates")
+            conn.executemany("INSERT OR IGNORE INTO candidates (item_hash) VALUES (?)", [(h,) for h in maybe_sent])
+            sent = {{row[0] for row in conn.execute(
+                "SELECT item_hash FROM candidates JOIN sent_items USING (item_hash)"
+            )}}
+    return [item for item, item_hash in zip(items, hashes) if item_hash not in sent]
+
+def mark_as_sent(items: List[Dict]):
+    """Mark items as sent in a single transaction"""
+    sent_at = datetime.now().isoformat()
+    hashes = [get_item_hash(item) for item in items]
+    conn = get_db()
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO sent_items (item_hash, sent_at, item_type, title) VALUES (?, ?, ?, ?)",
+            [(h, sent_at, item.get('type', 'unknown'), item.get('title', '')[:200]) for h, item in zip(hashes, items)]
+        )
+        max_rowid = conn.execute("SELECT MAX(rowid) FROM sent_items").fetchone()[0] or 0
+    bloom_add(get_sent_filter(), hashes, max_rowid)
 
 def log_run(started_at: str, status: str, items_collected: int, items_sent: int, error: str = None):
     """Log run to history"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute(
-        "INSERT INTO run_history (started_at, finished_at, status, items_collected, items_sent, error) VALUES (?, ?, ?, ?, ?, ?)",
-        (started_at, datetime.now().isoformat(), status, items_collected, items_sent, error)
-    )
-    conn.commit()
-    conn.close()
+    if status == 'success':
+        commit_http_cache()
+    conn = get_db()
+    with conn:
+        conn.execute(
+            "INSERT INTO run_history (started_at, finished_at, status, items_collected, items_sent, error) VALUES (?, ?, ?, ?, ?, ?)",
+            (started_at, datetime.now().isoformat(), status, items_collected, items_sent, error)
+        )
 
 def get_item_hash(item: Dict) -> str:
     """Generate unique hash for an item"""
     content = json.dumps(item, sort_keys=True)
     return hashlib.md5(content.encode()).hexdigest()
 
+_http_cache = {{}}
+
+def load_http_cache():
+    """Read all stored validators once, on the main thread, before collecting"""
+    global _http_cache
+    rows = get_db().execute("SELECT url, etag, last_modified, body FROM http_cache").fetchall()
+    _http_cache = {{row[0]: {{'etag': row[1], 'last_modified': row[2], 'body': row[3]}} for row in rows}}
+
+def get_http_cache(url: str) -> Optional[Dict]:
+    """Get the validators (and body) stored for a URL"""
+    return _http_cache.get(url)
+
+_pending_http_cache = {{}}
+_pending_http_cache_lock = threading.Lock()
+
+def save_http_cache(url: str, resp: requests.Response, body: str = None):
+    """Remember the ETag/Last-Modified of a response; stored once the run succeeds"""
+    etag = resp.headers.get('ETag')
+    last_modified = resp.headers.get('Last-Modified')
+    if not etag and not last_modified:
+        return
+    with _pending_http_cache_lock:
+        _pending_http_cache[url] = (url, etag, last_modified, body, datetime.now().isoformat())
+
+def commit_http_cache():
+    """Store the validators of this run, so unsent items are fetched again after a failed run"""
+    with _pending_http_cache_lock:
+        rows = list(_pending_http_cache.values())
+        _pending_http_cache.clear()
+    if not rows:
+        return
+    conn = get_db()
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO http_cache (url, etag, last_modified, body, fetched_at) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+
+def conditional_headers(cached: Optional[Dict]) -> Dict:
+    """If-None-Match/If-Modified-Since headers for a cached URL"""
+    headers = {{}}
+    if cached and cached['etag']:
+        headers['If-None-Match'] = cached['etag']
+    if cached and cached['last_modified']:
+        headers['If-Modified-Since'] = cached['last_modified']
+    return headers
+
+# ==================================================
+# Sent Items Filter
+# ==================================================
+
+# Bloom filter of sent item hashes next to bot.db, memory-mapped on first use.
+# A miss is definite, so only probable hits are checked in sent_items. The header
+# records the highest sent_items rowid covered; if it does not match the table
+# (crash between commit and filter update, deleted file, capacity reached), the
+# filter is rebuilt from sent_items.
+BLOOM_PATH = DATA_DIR / 'sent_items.bloom'
+BLOOM_CAPACITY = int(os.getenv('BLOOM_CAPACITY', '100000'))
+BLOOM_ERROR_RATE = 0.01
+BLOOM_MAGIC = b'BFS1'
+BLOOM_HEADER = struct.Struct('<4sQQIQQ')  # magic, capacity, bits, hashes, items, max rowid
+
+_sent_filter = None
+
+def bloom_positions(item_hash: str, bits: int, hashes: int):
+    """Bit positions of an MD5 hex hash (double hashing on its two halves)"""
+    h1 = int(item_hash[:16], 16)
+    h2 = int(item_hash[16:32], 16) | 1
+    return [(h1 + i * h2) % bits for i in range(hashes)]
+
+def bloom_contains(mm: mmap.mmap, item_hash: str) -> bool:
+    """False if the hash was never added"""
+    _, _, bits, hashes, _, _ = BLOOM_HEADER.unpack_from(mm, 0)
+    offset = BLOOM_HEADER.size
+    return all(mm[offset + (pos >> 3)] & (1 << (pos & 7)) for pos in bloom_positions(item_hash, bits, hashes))
+
+def bloom_add(mm: mmap.mmap, item_hashes: List[str], max_rowid: int):
+    """Add hashes and record the sent_items rowid they cover"""
+    magic, capacity, bits, hashes, count, _ = BLOOM_HEADER.unpack_from(mm, 0)
+    offset = BLOOM_HEADER.size
+    for item_hash in item_hashes:
+        for pos in bloom_positions(item_hash, bits, hashes):
+            mm[offset + (pos >> 3)] |= 1 << (pos & 7)
+    mm.flush()
+    # Header last: a crash before this leaves a stale rowid and forces a rebuild
+    BLOOM_HEADER.pack_into(mm, 0, magic, capacity, bits, hashes, count + len(item_hashes), max_rowid)
+    mm.flush()
+
+def open_sent_filter() -> Optional[mmap.mmap]:
+    """Map the filter file, or None if it is missing or invalid"""
+    try:
+        with open(BLOOM_PATH, 'r+b') as f:
+            mm = mmap.mmap(f.fileno(), 0)
+    except (OSError, ValueError):
+        return None
+    if len(mm) < BLOOM_HEADER.size or BLOOM_HEADER.unpack_from(mm, 0)[0] != BLOOM_MAGIC:
+        mm.close()
+        return None
+    bits = BLOOM_HEADER.unpack_from(mm, 0)[2]
+    if len(mm) != BLOOM_HEADER.size + (bits + 7) // 8:
+        mm.close()
+        return None
+    return mm
+
+def rebuild_sent_filter() -> mmap.mmap:
+    """Build a new filter from all hashes in sent_items"""
+    conn = get_db()
+    count, max_rowid = conn.execute("SELECT COUNT(*), COALESCE(MAX(rowid), 0) FROM sent_items").fetchone()
+    capacity = max(BLOOM_CAPACITY, count * 2)
+    bits = max(8192, int(-capacity * math.log(BLOOM_ERROR_RATE) / math.log(2) ** 2))
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    logger.info(f"Building sent items filter for {{count}} items ({{bits // 8 // 1024}} KB)")
+
+    tmp_path = BLOOM_PATH.with_suffix('.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(BLOOM_HEADER.pack(BLOOM_MAGIC, capacity, bits, hashes, 0, 0))
+        f.truncate(BLOOM_HEADER.size + (bits + 7) // 8)
+    with open(tmp_path, 'r+b') as f:
+        mm = mmap.mmap(f.fileno(), 0)
+    cursor = conn.execute("SELECT item_hash FROM sent_items WHERE rowid <= ?", (max_rowid,))
+    while True:
+        rows = cursor.fetchmany(10000)
+        if not rows:
+            break
+        bloom_add(mm, [row[0] for row in rows], max_rowid)
+    mm.close()
+    os.replace(tmp_path, BLOOM_PATH)
+    return open_sent_filter()
+
+def get_sent_filter() -> mmap.mmap:
+    """The sent items filter, rebuilt if it is missing, stale or full"""
+    global _sent_filter
+    if _sent_filter is None:
+        mm = open_sent_filter()
+        if mm is not None:
+            _, capacity, _, _, count, max_rowid = BLOOM_HEADER.unpack_from(mm, 0)
+            current = get_db().execute("SELECT COALESCE(MAX(rowid), 0) FROM sent_items").fetchone()[0]
+            if max_rowid != current or count > capacity:
+                mm.close()
+                mm = None
+        _sent_filter = mm if mm is not None else rebuild_sent_filter()
+    return _sent_filter
+
 # ==================================================
 # Retry Decorator
 # ==================================================
@@ -863,7 +3243,51 @@ def retry_on_error(max_retries: int = 3, backoff: float = 2.0):
         return wrapper
     return decorator
 
-'''.format(bot_name=bot_name)
+# ==================================================
+# Concurrent Collection
+# ==================================================
+
+_fetch_pool = ThreadPoolExecutor(max_workers=max(1, COLLECT_WORKERS), thread_name_prefix='fetch')
+_host_slots = {{}}
+_host_slots_lock = threading.Lock()
+
+def host_slot(url: str) -> threading.BoundedSemaphore:
+    """Semaphore capping concurrent requests to the host of url"""
+    host = urlparse(url).netloc
+    with _host_slots_lock:
+        if host not in _host_slots:
+            _host_slots[host] = threading.BoundedSemaphore(max(1, COLLECT_PER_HOST))
+        return _host_slots[host]
+
+def fetch_all(fetch, entries: List) -> List[Dict]:
+    """Run fetch(entry) for all entries on the fetch pool; items come back in entry order"""
+    items = []
+    for result in _fetch_pool.map(fetch, entries):
+        items.extend(result)
+    return items
+
+# ==================================================
+# HTTP Session
+# ==================================================
+
+def create_http_session() -> requests.Session:
+    """Keep-alive session with a connection pool per host, shared by all collectors and outputs"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=max(10, COLLECT_WORKERS),  # Hosts kept in the pool
+        pool_maxsize=max(1, COLLECT_PER_HOST)  # Idle connections kept per host
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+http_session = create_http_session()
+
+'''.format(
+            bot_name=bot_name,
+            collect_workers=collect_workers,
+            collect_per_host=collect_per_host
+        )
 
         # RSS Collection
         if ds.get('rss', {}).get('enabled'):
@@ -876,26 +3300,38 @@ def retry_on_error(max_retries: int = 3, backoff: float = 2.0):
 
 RSS_FEEDS = {feeds_str}
 
+def fetch_rss_feed(feed_config: Dict) -> List[Dict]:
+    """Fetch the items of one RSS feed"""
+    items = []
+    try:
+        logger.info(f"Fetching RSS: {{feed_config.get('name', feed_config.get('url'))}}")
+        headers = conditional_headers(get_http_cache(feed_config['url']))
+        with host_slot(feed_config['url']):
+            resp = http_session.get(feed_config['url'], headers=headers, timeout=REQUEST_TIMEOUT)
+        if resp.status_code == 304:
+            logger.info(f"RSS not modified: {{feed_config.get('url')}}")
+            return items
+        resp.raise_for_status()
+        feed = feedparser.parse(resp.content)
+        save_http_cache(feed_config['url'], resp)
+        for entry in feed.entries[:20]:  # Limit per feed
+            item = {{
+                'type': 'rss',
+                'source': feed_config.get('name', 'RSS'),
+                'title': entry.get('title', ''),
+                'link': entry.get('link', ''),
+                'summary': BeautifulSoup(entry.get('summary', ''), 'html.parser').get_text()[:500],
+                'published': entry.get('published', ''),
+            }}
+            items.append(item)
+    except Exception as e:
+        logger.error(f"Error fetching RSS {{feed_config.get('url')}}: {{e}}")
+    return items
+
 @retry_on_error()
 def collect_rss() -> List[Dict]:
     """Collect items from RSS feeds"""
-    items = []
-    for feed_config in RSS_FEEDS:
-        try:
-            logger.info(f"Fetching RSS: {{feed_config.get('name', feed_config.get('url'))}}")
-            feed = feedparser.parse(feed_config['url'])
-            for entry in feed.entries[:20]:  # Limit per feed
-                item = {{
-                    'type': 'rss',
-                    'source': feed_config.get('name', 'RSS'),
-                    'title': entry.get('title', ''),
-                    'link': entry.get('link', ''),
-                    'summary': BeautifulSoup(entry.get('summary', ''), 'html.parser').get_text()[:500],
-                    'published': entry.get('published', ''),
-                }}
-                items.append(item)
-        except Exception as e:
-            logger.error(f"Error fetching RSS {{feed_config.get('url')}}: {{e}}")
+    items = fetch_all(fetch_rss_feed, RSS_FEEDS)
     logger.info(f"Collected {{len(items)}} RSS items")
     return items
 
@@ -912,43 +3348,57 @@ def collect_rss() -> List[Dict]:
 
 API_ENDPOINTS = {endpoints_str}
 
-@retry_on_error()
-def collect_api() -> List[Dict]:
-    """Collect data from REST APIs"""
-    items = []
-    for ep in API_ENDPOINTS:
-        try:
-            logger.info(f"Fetching API: {{ep.get('name', ep.get('url'))}}")
-            headers = json.loads(ep.get('headers', '{{}}'))
-            resp = requests.request(
-                ep.get('method', 'GET'),
+def fetch_api_endpoint(ep: Dict) -> List[Dict]:
+    """Fetch one REST API endpoint"""
+    try:
+        logger.info(f"Fetching API: {{ep.get('name', ep.get('url'))}}")
+        headers = json.loads(ep.get('headers', '{{}}'))
+        method = ep.get('method', 'GET')
+        cached = get_http_cache(ep['url']) if method == 'GET' else None
+        headers.update(conditional_headers(cached))
+        with host_slot(ep['url']):
+            resp = http_session.request(
+                method,
                 ep['url'],
                 headers=headers,
                 timeout=REQUEST_TIMEOUT
             )
+        if resp.status_code == 304 and cached:
+            # Unchanged: reuse the stored body instead of downloading it again
+            logger.info(f"API not modified: {{ep.get('url')}}")
+            data = json.loads(cached['body'])
+        else:
             resp.raise_for_status()
             data = resp.json()
+            if method == 'GET':
+                save_http_cache(ep['url'], resp, resp.text)
 
-            # Apply JSONPath if specified
-            json_path = ep.get('jsonPath', '')
-            if json_path:
-                try:
-                    expr = jsonpath_parse(json_path)
-                    matches = [m.value for m in expr.find(data)]
-                    data = matches[0] if len(matches) == 1 else matches
-                except Exception as e:
-                    logger.warning(f"JSONPath error: {{e}}")
+        # Apply JSONPath if specified
+        json_path = ep.get('jsonPath', '')
+        if json_path:
+            try:
+                expr = jsonpath_parse(json_path)
+                matches = [m.value for m in expr.find(data)]
+                data = matches[0] if len(matches) == 1 else matches
+            except Exception as e:
+                logger.warning(f"JSONPath error: {{e}}")
+
+        item = {{
+            'type': 'api',
+            'source': ep.get('name', 'API'),
+            'title': ep.get('name', 'API Response'),
+            'data': data,
+            'url': ep['url'],
+        }}
+        return [item]
+    except Exception as e:
+        logger.error(f"Error fetching API {{ep.get('url')}}: {{e}}")
+        return []
 
-            item = {{
-                'type': 'api',
-                'source': ep.get('name', 'API'),
-                'title': ep.get('name', 'API Response'),
-                'data': data,
-                'url': ep['url'],
-            }}
-            items.append(item)
-        except Exception as e:
-            logger.error(f"Error fetching API {{ep.get('url')}}: {{e}}")
+@retry_on_error()
+def collect_api() -> List[Dict]:
+    """Collect data from REST APIs"""
+    items = fetch_all(fetch_api_endpoint, API_ENDPOINTS)
     logger.info(f"Collected {{len(items)}} API items")
     return items
 
@@ -965,31 +3415,36 @@ def collect_api() -> List[Dict]:
 
 SCRAPE_URLS = {urls_str}
 
-@retry_on_error()
-def collect_scraping() -> List[Dict]:
-    """Scrape data from websites"""
+def fetch_scrape_url(url_config: Dict) -> List[Dict]:
+    """Scrape one website"""
     items = []
-    for url_config in SCRAPE_URLS:
-        try:
-            logger.info(f"Scraping: {{url_config.get('name', url_config.get('url'))}}")
-            resp = requests.get(url_config['url'], timeout=REQUEST_TIMEOUT)
-            resp.raise_for_status()
-            soup = BeautifulSoup(resp.text, 'html.parser')
+    try:
+        logger.info(f"Scraping: {{url_config.get('name', url_config.get('url'))}}")
+        with host_slot(url_config['url']):
+            resp = http_session.get(url_config['url'], timeout=REQUEST_TIMEOUT)
+        resp.raise_for_status()
+        soup = BeautifulSoup(resp.text, 'html.parser')
 
-            selector = url_config.get('selector', 'body')
-            elements = soup.select(selector)
+        selector = url_config.get('selector', 'body')
+        elements = soup.select(selector)
 
-            for el in elements[:10]:
-                item = {{
-                    'type': 'scrape',
-                    'source': url_config.get('name', 'Web'),
-                    'title': url_config.get('name', 'Scraped'),
-                    'content': el.get_text(strip=True)[:1000],
-                    'url': url_config['url'],
-                }}
-                items.append(item)
-        except Exception as e:
-            logger.error(f"Error scraping {{url_config.get('url')}}: {{e}}")
+        for el in elements[:10]:
+            item = {{
+                'type': 'scrape',
+                'source': url_config.get('name', 'Web'),
+                'title': url_config.get('name', 'Scraped'),
+                'content': el.get_text(strip=True)[:1000],
+                'url': url_config['url'],
+            }}
+            items.append(item)
+    except Exception as e:
+        logger.error(f"Error scraping {{url_config.get('url')}}: {{e}}")
+    return items
+
+@retry_on_error()
+def collect_scraping() -> List[Dict]:
+    """Scrape data from websites"""
+    items = fetch_all(fetch_scrape_url, SCRAPE_URLS)
     logger.info(f"Collected {{len(items)}} scraped items")
     return items
 
@@ -1015,7 +3470,7 @@ def collect_weather() -> List[Dict]:
 
     try:
         url = f"https://api.openweathermap.org/data/2.5/weather?q={WEATHER_LOCATION}&appid={WEATHER_API_KEY}&units=metric"
-        resp = requests.get(url, timeout=REQUEST_TIMEOUT)
+        resp = http_session.get(url, timeout=REQUEST_TIMEOUT)
         resp.raise_for_status()
         data = resp.json()
 
@@ -1050,38 +3505,39 @@ HA_URL = os.getenv('HOMEASSISTANT_URL', '')
 HA_TOKEN = os.getenv('HOMEASSISTANT_TOKEN', '')
 HA_SENSORS = {sensors_str}
 
+def fetch_ha_sensor(sensor: Dict) -> List[Dict]:
+    """Fetch the state of one Home Assistant sensor"""
+    headers = {{"Authorization": f"Bearer {{HA_TOKEN}}", "Content-Type": "application/json"}}
+    try:
+        entity_id = sensor.get('entity', '')
+        url = f"{{HA_URL}}/api/states/{{entity_id}}"
+        with host_slot(url):
+            resp = http_session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        resp.raise_for_status()
+        data = resp.json()
+
+        item = {{
+            'type': 'homeassistant',
+            'source': 'Home Assistant',
+            'title': sensor.get('name', entity_id),
+            'entity_id': entity_id,
+            'state': data.get('state'),
+            'unit': data.get('attributes', {{}}).get('unit_of_measurement', ''),
+            'friendly_name': data.get('attributes', {{}}).get('friendly_name', ''),
+        }}
+        logger.info(f"HA {{entity_id}}: {{item['state']}} {{item['unit']}}")
+        return [item]
+    except Exception as e:
+        logger.error(f"Error fetching HA sensor {{sensor}}: {{e}}")
+        return []
+
 @retry_on_error()
 def collect_homeassistant() -> List[Dict]:
     """Get sensor data from Home Assistant"""
-    items = []
     if not HA_URL or not HA_TOKEN:
         logger.warning("Home Assistant not configured")
-        return items
-
-    headers = {{"Authorization": f"Bearer {{HA_TOKEN}}", "Content-Type": "application/json"}}
-
-    for sensor in HA_SENSORS:
-        try:
-            entity_id = sensor.get('entity', '')
-            url = f"{{HA_URL}}/api/states/{{entity_id}}"
-            resp = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
-            resp.raise_for_status()
-            data = resp.json()
-
-            item = {{
-                'type': 'homeassistant',
-                'source': 'Home Assistant',
-                'title': sensor.get('name', entity_id),
-                'entity_id': entity_id,
-                'state': data.get('state'),
-                'unit': data.get('attributes', {{}}).get('unit_of_measurement', ''),
-                'friendly_name': data.get('attributes', {{}}).get('friendly_name', ''),
-            }}
-            items.append(item)
-            logger.info(f"HA {{entity_id}}: {{item['state']}} {{item['unit']}}")
-        except Exception as e:
-            logger.error(f"Error fetching HA sensor {{sensor}}: {{e}}")
-    return items
+        return []
+    return fetch_all(fetch_ha_sensor, HA_SENSORS)
 
 '''
 
@@ -1117,7 +3573,7 @@ def zimaos_login() -> str:
         return None
 
     try:
-        resp = requests.post(
+        resp = http_session.post(
             f"{{ZIMAOS_URL}}/v1/users/login",
             json={{"username": ZIMAOS_USER, "password": ZIMAOS_PASS}},
             timeout=REQUEST_TIMEOUT
@@ -1140,92 +3596,93 @@ def zimaos_login() -> str:
         logger.error(f"ZimaOS login failed: {{e}}")
         return None
 
-@retry_on_error()
-def collect_zimaos() -> List[Dict]:
-    """Collect system data from ZimaOS API"""
-    items = []
-    token = zimaos_login()
-    if not token:
-        return items
-
-    headers = {{"Authorization": f"Bearer {{token}}"}}
+ZIMAOS_ENDPOINTS = {{
+    'system': '/v2/zimaos/info',
+    'cpu': '/v1/sys/utilization',
+    'memory': '/v1/sys/utilization',
+    'apps': '/v2/app_management/apps',
+    'storage': '/v1/storage/disks',
+}}
 
-    endpoints = {{
-        'system': '/v2/zimaos/info',
-        'cpu': '/v1/sys/utilization',
-        'memory': '/v1/sys/utilization',
-        'apps': '/v2/app_management/apps',
-        'storage': '/v1/storage/disks',
-    }}
-
-    for metric in ZIMAOS_METRICS:
-        if metric not in endpoints:
-            continue
-        try:
-            url = f"{{ZIMAOS_URL}}{{endpoints[metric]}}"
-            logger.info(f"Fetching ZimaOS {{metric}}: {{url}}")
-            resp = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
-            resp.raise_for_status()
-            data = resp.json()
+def fetch_zimaos_metric(metric: str, headers: Dict) -> List[Dict]:
+    """Fetch one ZimaOS metric"""
+    try:
+        url = f"{{ZIMAOS_URL}}{{ZIMAOS_ENDPOINTS[metric]}}"
+        logger.info(f"Fetching ZimaOS {{metric}}: {{url}}")
+        with host_slot(url):
+            resp = http_session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        resp.raise_for_status()
+        data = resp.json()
 
-            # Extract relevant data based on metric type
-            if metric == 'cpu':
-                value = data.get('data', {{}}).get('cpu', data.get('cpu', {{}}))
-                item = {{
-                    'type': 'zimaos',
-                    'source': 'ZimaOS',
-                    'metric': 'cpu',
-                    'title': 'CPU Usage',
-                    'value': value.get('percent', value) if isinstance(value, dict) else value,
-                    'data': value,
-                }}
-            elif metric == 'memory':
-                value = data.get('data', {{}}).get('mem', data.get('mem', {{}}))
-                item = {{
-                    'type': 'zimaos',
-                    'source': 'ZimaOS',
-                    'metric': 'memory',
-                    'title': 'Memory Usage',
-                    'value': value.get('usedPercent', value) if isinstance(value, dict) else value,
-                    'data': value,
-                }}
-            elif metric == 'system':
-                item = {{
-                    'type': 'zimaos',
-                    'source': 'ZimaOS',
-                    'metric': 'system',
-                    'title': 'System Info',
-                    'data': data.get('data', data),
-                }}
-            elif metric == 'apps':
-                apps = data.get('data', data)
-                if isinstance(apps, list):
-                    item = {{
-                        'type': 'zimaos',
-                        'source': 'ZimaOS',
-                        'metric': 'apps',
-                        'title': f'Docker Apps ({{len(apps)}} running)',
-                        'count': len(apps),
-                        'apps': [a.get('name', 'unknown') for a in apps[:20]],
-                    }}
-                else:
-                    item = {{'type': 'zimaos', 'source': 'ZimaOS', 'metric': 'apps', 'data': apps}}
-            elif metric == 'storage':
+        # Extract relevant data based on metric type
+        if metric == 'cpu':
+            value = data.get('data', {{}}).get('cpu', data.get('cpu', {{}}))
+            item = {{
+                'type': 'zimaos',
+                'source': 'ZimaOS',
+                'metric': 'cpu',
+                'title': 'CPU Usage',
+                'value': value.get('percent', value) if isinstance(value, dict) else value,
+                'data': value,
+            }}
+        elif metric == 'memory':
+            value = data.get('data', {{}}).get('mem', data.get('mem', {{}}))
+            item = {{
+                'type': 'zimaos',
+                'source': 'ZimaOS',
+                'metric': 'memory',
+                'title': 'Memory Usage',
+                'value': value.get('usedPercent', value) if isinstance(value, dict) else value,
+                'data': value,
+            }}
+        elif metric == 'system':
+            item = {{
+                'type': 'zimaos',
+                'source': 'ZimaOS',
+                'metric': 'system',
+                'title': 'System Info',
+                'data': data.get('data', data),
+            }}
+        elif metric == 'apps':
+            apps = data.get('data', data)
+            if isinstance(apps, list):
                 item = {{
                     'type': 'zimaos',
                     'source': 'ZimaOS',
-                    'metric': 'storage',
-                    'title': 'Storage Info',
-                    'data': data.get('data', data),
+                    'metric': 'apps',
+                    'title': f'Docker Apps ({{len(apps)}} running)',
+                    'count': len(apps),
+                    'apps': [a.get('name', 'unknown') for a in apps[:20]],
                 }}
             else:
-                item = {{'type': 'zimaos', 'source': 'ZimaOS', 'metric': metric, 'data': data}}
+                item = {{'type': 'zimaos', 'source': 'ZimaOS', 'metric': 'apps', 'data': apps}}
+        elif metric == 'storage':
+            item = {{
+                'type': 'zimaos',
+                'source': 'ZimaOS',
+                'metric': 'storage',
+                'title': 'Storage Info',
+                'data': data.get('data', data),
+            }}
+        else:
+            item = {{'type': 'zimaos', 'source': 'ZimaOS', 'metric': metric, 'data': data}}
 
-            items.append(item)
-            logger.info(f"ZimaOS {{metric}}: collected")
-        except Exception as e:
-            logger.error(f"Error fetching ZimaOS {{metric}}: {{e}}")
+        logger.info(f"ZimaOS {{metric}}: collected")
+        return [item]
+    except Exception as e:
+        logger.error(f"Error fetching ZimaOS {{metric}}: {{e}}")
+        return []
+
+@retry_on_error()
+def collect_zimaos() -> List[Dict]:
+    """Collect system data from ZimaOS API"""
+    token = zimaos_login()
+    if not token:
+        return []
 
+    headers = {{"Authorization": f"Bearer {{token}}"}}
+    metrics = [m for m in ZIMAOS_METRICS if m in ZIMAOS_ENDPOINTS]
+    items = fetch_all(lambda metric: fetch_zimaos_metric(metric, headers), metrics)
     logger.info(f"Collected {{len(items)}} ZimaOS items")
     return items
 
@@ -1402,7 +3859,7 @@ def process_with_ai(items: List[Dict]) -> List[Dict]:
 
         prompt = f"Summarize these items concisely in 2-3 paragraphs:\\n\\n{chr(10).join(content_parts)}"
 
-        response = requests.post(
+        response = http_session.post(
             f"{OLLAMA_URL}/api/generate",
             json={
                 "model": OLLAMA_MODEL,
@@ -1448,7 +3905,7 @@ def send_telegram(message: str) -> bool:
 
     try:
         url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-        resp = requests.post(url, json={
+        resp = http_session.post(url, json={
             'chat_id': TELEGRAM_CHAT_ID,
             'text': message[:4000],
             'parse_mode': 'HTML',
@@ -1479,7 +3936,7 @@ def send_discord(message: str) -> bool:
         return False
 
     try:
-        resp = requests.post(DISCORD_WEBHOOK_URL, json={
+        resp = http_session.post(DISCORD_WEBHOOK_URL, json={
             'content': message[:2000]
         }, timeout=REQUEST_TIMEOUT)
         resp.raise_for_status()
@@ -1507,7 +3964,7 @@ def send_slack(message: str) -> bool:
         return False
 
     try:
-        resp = requests.post(SLACK_WEBHOOK_URL, json={
+        resp = http_session.post(SLACK_WEBHOOK_URL, json={
             'text': message[:4000]
         }, timeout=REQUEST_TIMEOUT)
         resp.raise_for_status()
@@ -1585,7 +4042,7 @@ def send_pushover(message: str, title: str = None) -> bool:
         return False
 
     try:
-        resp = requests.post("https://api.pushover.net/1/messages.json", data={
+        resp = http_session.post("https://api.pushover.net/1/messages.json", data={
             'token': PUSHOVER_API_TOKEN,
             'user': PUSHOVER_USER_KEY,
             'message': message[:1024],
@@ -1603,19 +4060,19 @@ def send_pushover(message: str, title: str = None) -> bool:
         # Build collect_data function
         collectors = []
         if ds.get('rss', {}).get('enabled'):
-            collectors.append('items.extend(collect_rss())')
+            collectors.append('collect_rss')
         if ds.get('api', {}).get('enabled'):
-            collectors.append('items.extend(collect_api())')
+            collectors.append('collect_api')
         if ds.get('scraping', {}).get('enabled'):
-            collectors.append('items.extend(collect_scraping())')
+            collectors.append('collect_scraping')
         if ds.get('weather', {}).get('enabled'):
-            collectors.append('items.extend(collect_weather())')
+            collectors.append('collect_weather')
         if ds.get('homeassistant', {}).get('enabled'):
-            collectors.append('items.extend(collect_homeassistant())')
+            collectors.append('collect_homeassistant')
         if ds.get('zimaos', {}).get('enabled'):
-            collectors.append('items.extend(collect_zimaos())')
+            collectors.append('collect_zimaos')
 
-        collect_code = '\n    '.join(collectors) if collectors else '# No data sources configured'
+        collect_code = ', '.join(collectors)
 
         # Build send_outputs function
         outputs = []
@@ -1642,9 +4099,15 @@ def send_pushover(message: str, title: str = None) -> bool:
 # ==================================================
 
 def collect_data() -> List[Dict]:
-    """Collect data from all configured sources"""
+    """Collect data from all configured sources concurrently, in a fixed source order"""
+    collectors = [{collect_code}]
     items = []
-    {collect_code}
+    if not collectors:
+        return items
+    # Sources get their own pool: their fetches queue on _fetch_pool
+    with ThreadPoolExecutor(max_workers=len(collectors), thread_name_prefix='collect') as pool:
+        for result in pool.map(lambda collect: collect(), collectors):
+            items.extend(result)
     return items
 
 def format_message(items: List[Dict]) -> str:
@@ -1700,6 +4163,7 @@ def main():
 
     try:
         # Collect
+        load_http_cache()
         items = collect_data()
         logger.info(f"Collected {{len(items)}} items total")
 
@@ -1709,11 +4173,7 @@ def main():
             return 0
 
         # Deduplication
-        {"new_items = []" if dedup_enabled else "new_items = items"}
-        {"for item in items:" if dedup_enabled else ""}
-        {"    item_hash = get_item_hash(item)" if dedup_enabled else ""}
-        {"    if not is_already_sent(item_hash):" if dedup_enabled else ""}
-        {"        new_items.append(item)" if dedup_enabled else ""}
+        {"new_items = filter_unsent(items)" if dedup_enabled else "new_items = items"}
 
         {"if not new_items:" if dedup_enabled else "if False:"}
             logger.info("No new items after deduplication")
@@ -1730,8 +4190,7 @@ def main():
         send_outputs(message)
 
         # Mark as sent
-        {"for item in new_items:" if dedup_enabled else ""}
-        {"    mark_as_sent(get_item_hash(item), item.get('type', 'unknown'), item.get('title', ''))" if dedup_enabled else ""}
+        {"mark_as_sent(new_items)" if dedup_enabled else ""}
 
         items_sent = len(new_items)
         log_run(started_at, 'success', len(items), items_sent)
@@ -1750,6 +4209,70 @@ if __name__ == '__main__':
         return code
 
 
+# ==================================================
+# Leader Election
+# ==================================================
+
+class LeaderElection:
+    """Elects the one process that owns the scheduler
+
+    Every server process tries to take an exclusive flock on `lock_path`.
+    The holder is the leader: `on_elected` starts its task manager and
+    returns the address of its internal listener, which is written into the
+    lock file for followers to forward to. The kernel drops the lock when
+    the leader dies, and the next follower to poll it takes over.
+    """
+
+    def __init__(self, lock_path: str, on_elected: Callable[[], str],
+                 interval: float = LEADER_POLL_INTERVAL):
+        self.lock_path = lock_path
+        self.on_elected = on_elected
+        self.interval = interval
+        self.is_leader = False
+        self._file = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Try to lead now, then keep trying in the background until elected"""
+        if self._try_acquire():
+            return
+        logger.info(f"Following the scheduler leader ({self.lock_path})")
+        threading.Thread(target=self._poll, name='leader-election', daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _try_acquire(self) -> bool:
+        f = open(self.lock_path, 'a+')
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+
+        self._file = f
+        self.is_leader = True
+        address = self.on_elected()
+        f.seek(0)
+        f.truncate()
+        f.write(json.dumps({'pid': os.getpid(), 'address': address}))
+        f.flush()
+        logger.info(f"Elected scheduler leader (pid {os.getpid()}, {address})")
+        return True
+
+    def _poll(self):
+        while not self._stop.wait(self.interval):
+            if self._try_acquire():
+                return
+
+    def leader_address(self) -> Optional[str]:
+        try:
+            with open(self.lock_path) as f:
+                return json.load(f).get('address')
+        except (OSError, ValueError):
+            return None
+
+
 # ==================================================
 # Flask Application
 # ==================================================
@@ -1759,6 +4282,75 @@ CORS(app)
 
 db: Optional[Database] = None
 task_manager: Optional[TaskManager] = None
+leader: Optional[LeaderElection] = None
+
+FORWARDED_HEADER = 'X-Bot-Factory-Forwarded'
+FORWARD_REQUEST_HEADERS = ('Authorization', 'Content-Type', 'Accept', 'If-None-Match', 'Last-Event-ID')
+FORWARD_RESPONSE_HEADERS = ('Content-Type', 'ETag', 'Cache-Control', 'X-Accel-Buffering', 'WWW-Authenticate')
+
+
+@app.before_request
+def start_request_timer():
+    request.environ['botfactory.started'] = time.perf_counter()
+
+
+@app.after_request
+def observe_request(response):
+    started = request.environ.get('botfactory.started')
+    # Forwarded requests are observed by the worker that received them
+    if started is not None and not request.headers.get(FORWARDED_HEADER):
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_REQUEST.labels(request.method, route, response.status_code).observe(time.perf_counter() - started)
+    return response
+
+
+class ResponseCache:
+    """Serialized JSON responses, valid until the task manager's state version changes"""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: Dict[Any, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, version: int, build: Callable[[], tuple]) -> tuple:
+        """Return (etag, body); build() returns (data, expires_at timestamp or None)"""
+        now = datetime.now().timestamp()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry[0] == version and (entry[3] is None or now < entry[3]):
+            return entry[1], entry[2]
+
+        data, expires_at = build()
+        body = app.json.dumps(data)
+        etag = hashlib.md5(body.encode()).hexdigest()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (version, etag, body, expires_at)
+        return etag, body
+
+
+response_cache = ResponseCache()
+
+
+def cached_json_response(key, build: Callable[[], tuple]):
+    """JSON response served from response_cache, answering If-None-Match with 304"""
+    etag, body = response_cache.get(key, task_manager.version, build)
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+
+def status_expiry(status: Dict) -> float:
+    """Time at which a status payload goes stale without any state change:
+    the earliest next_run that will have passed, or midnight for runs_today"""
+    now = datetime.now()
+    expiry = datetime(now.year, now.month, now.day).timestamp() + 86400
+    for task in status['tasks']:
+        if task['next_run']:
+            expiry = min(expiry, datetime.fromisoformat(task['next_run']).timestamp())
+    return expiry
 
 
 def check_auth():
@@ -1786,6 +4378,59 @@ def require_auth(f):
     return decorated
 
 
+def forward_to_leader():
+    """Proxy the current request to the scheduler leader's internal listener"""
+    address = leader.leader_address()
+    if not address or request.headers.get(FORWARDED_HEADER):
+        return jsonify({'error': 'Scheduler leader unavailable'}), 503
+
+    headers = {name: request.headers[name] for name in FORWARD_REQUEST_HEADERS if name in request.headers}
+    headers[FORWARDED_HEADER] = '1'
+    streaming = 'text/event-stream' in request.headers.get('Accept', '')
+    upstream_request = urllib.request.Request(
+        f"http://{address}{request.full_path if request.query_string else request.path}",
+        data=request.get_data() or None, headers=headers, method=request.method
+    )
+    try:
+        upstream = urllib.request.urlopen(upstream_request, timeout=None if streaming else LEADER_TIMEOUT)
+    except urllib.error.HTTPError as e:
+        upstream = e  # Error statuses (and 304) still carry a response to pass on
+    except OSError as e:
+        logger.warning(f"Scheduler leader at {address} unreachable: {e}")
+        return jsonify({'error': 'Scheduler leader unavailable'}), 503
+
+    response_headers = {name: upstream.headers[name] for name in FORWARD_RESPONSE_HEADERS if name in upstream.headers}
+    if 'text/event-stream' in upstream.headers.get('Content-Type', ''):
+        def stream():
+            try:
+                while True:
+                    chunk = upstream.read1(65536)
+                    if not chunk:
+                        break
+                    yield chunk
+            except (OSError, ValueError, http.client.HTTPException) as e:
+                # Leader went away: end the stream, EventSource reconnects
+                logger.warning(f"Stream from scheduler leader at {address} ended: {e}")
+            finally:
+                upstream.close()
+        return Response(stream(), status=upstream.status, headers=response_headers)
+
+    with upstream:
+        body = upstream.read()
+    return Response(body, status=upstream.status, headers=response_headers)
+
+
+def leader_only(f):
+    """Decorator for routes that need the scheduler's state: followers
+    forward them to the leader"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if leader and not leader.is_leader:
+            return forward_to_leader()
+        return f(*args, **kwargs)
+    return decorated
+
+
 def validate_bot_name(name: str) -> bool:
     """Validate bot name to prevent path traversal and injection"""
     if not name or len(name) > 50:
@@ -1833,29 +4478,67 @@ def health():
     return jsonify({
         'status': 'healthy',
         'scheduler_running': task_manager.scheduler.running if task_manager else False,
+        'leader': leader.is_leader if leader else None,
         'timestamp': datetime.now().isoformat()
     })
 
 
+@app.route('/metrics')
+@require_auth
+@leader_only
+def metrics():
+    """Prometheus metrics of the scheduler, runner, database and API"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        # Counters and histograms summed over all gunicorn workers
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        registry.register(RUNNER_COLLECTOR)
+        return Response(generate_latest(registry), headers={'Content-Type': CONTENT_TYPE_LATEST})
+    return Response(generate_latest(), headers={'Content-Type': CONTENT_TYPE_LATEST})
+
+
 # --------------------------------------------------
 # Task Manager API
 # --------------------------------------------------
 
 @app.route('/api/tasks/status')
 @require_auth
+@leader_only
 def api_tasks_status():
-    return jsonify(task_manager.get_status())
+    def build():
+        status = task_manager.get_status()
+        return status, status_expiry(status)
+    return cached_json_response('status', build)
+
+
+RUN_STATUS_CODES = {'queued': 202, 'skipped': 409}
 
 
 @app.route('/api/tasks/<task_name>/run', methods=['POST'])
 @require_auth
+@leader_only
 def api_run_task(task_name):
+    if task_name not in task_manager.tasks:
+        return jsonify({'status': 'error', 'error': 'Task not found'}), 404
     result = task_manager.run_task_now(task_name)
-    return jsonify(result)
+    return jsonify(result), RUN_STATUS_CODES.get(result['status'], 200)
+
+
+@app.route('/api/tasks/run', methods=['POST'])
+@require_auth
+@leader_only
+def api_run_tasks():
+    """Queue several tasks at once: {"tasks": [names]}"""
+    data = request.get_json() or {}
+    names = data.get('tasks') or []
+    if not isinstance(names, list):
+        return jsonify({'error': 'tasks must be a list'}), 400
+    return jsonify({'runs': {name: task_manager.run_task_now(name) for name in names}}), 202
 
 
 @app.route('/api/tasks/<task_name>/enable', methods=['POST'])
 @require_auth
+@leader_only
 def api_enable_task(task_name):
     data = request.get_json() or {}
     enabled = data.get('enabled', True)
@@ -1866,6 +4549,7 @@ def api_enable_task(task_name):
 
 @app.route('/api/tasks/reload', methods=['POST'])
 @require_auth
+@leader_only
 def api_reload_tasks():
     task_manager.reload_config()
     return jsonify({'status': 'ok', 'message': 'Configuration reloaded'})
@@ -1873,11 +4557,27 @@ def api_reload_tasks():
 
 @app.route('/api/runs')
 @require_auth
+@leader_only
 def api_runs():
     limit = request.args.get('limit', 50, type=int)
     task_name = request.args.get('task')
-    runs = db.get_recent_runs(limit, task_name)
-    return jsonify(runs)
+    return cached_json_response(
+        ('runs', limit, task_name),
+        lambda: (db.get_recent_runs(limit, task_name), None)
+    )
+
+
+@app.route('/api/tasks/resources')
+@require_auth
+@leader_only
+def api_task_resources():
+    """Per-task p50/p95/max of CPU time, max RSS, block I/O and context switches"""
+    limit = request.args.get('limit', 100, type=int)
+    task_name = request.args.get('task')
+    return cached_json_response(
+        ('resources', limit, task_name),
+        lambda: (db.get_resource_stats(task_name, limit), None)
+    )
 
 
 @app.route('/api/runs/<int:run_id>')
@@ -1889,22 +4589,101 @@ def api_run_detail(run_id):
     return jsonify({'error': 'Run not found'}), 404
 
 
+@app.route('/api/runs/<int:run_id>/stream')
+@require_auth
+@leader_only
+def api_run_stream(run_id):
+    """Server-Sent Events tail of a run's output, live while it runs"""
+    run = db.get_run_detail(run_id)
+    if not run:
+        return jsonify({'error': 'Run not found'}), 404
+
+    runner = task_manager.runner
+    log_path = runner.log_path(run_id)
+
+    def stream():
+        # Wait for a queued run to start writing its log
+        while runner.is_run_queued(run_id) or (runner.is_run_active(run_id) and not os.path.exists(log_path)):
+            yield ": queued\n\n"
+            time.sleep(0.5)
+        if not os.path.exists(log_path):
+            # Run finished: replay what the database kept
+            finished = db.get_run_detail(run_id) or run
+            output = '\n'.join(filter(None, [finished.get('output'), finished.get('error')]))
+            if output:
+                yield f"event: output\ndata: {json.dumps(output)}\n\n"
+        else:
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            with open(log_path, 'rb') as f:
+                while True:
+                    active = runner.is_run_active(run_id)
+                    chunk = f.read(65536)
+                    if chunk:
+                        yield f"event: output\ndata: {json.dumps(decoder.decode(chunk))}\n\n"
+                        continue
+                    if not active:
+                        break
+                    time.sleep(0.25)
+        final = db.get_run_detail(run_id) or run
+        yield f"event: end\ndata: {json.dumps({'status': final['status'], 'exit_code': final['exit_code']})}\n\n"
+
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
 @app.route('/api/runs/<int:run_id>', methods=['DELETE'])
 @require_auth
+@leader_only
 def api_delete_run(run_id):
-    if db.delete_run(run_id):
+    # A queued run is cancelled, which also removes its row
+    if task_manager.runner.cancel_run(run_id) or db.delete_run(run_id):
+        task_manager.runner.delete_logs([run_id])
+        task_manager.notify('run_deleted', {'run_id': run_id})
         return jsonify({'success': True})
     return jsonify({'error': 'Run not found'}), 404
 
 
 @app.route('/api/runs', methods=['DELETE'])
 @require_auth
+@leader_only
 def api_clear_runs():
     task_name = request.args.get('task')
+    task_manager.runner.delete_logs(db.get_run_ids(task_name) if task_name else None)
     count = db.clear_runs(task_name)
+    task_manager.notify('runs_cleared', {'task': task_name})
     return jsonify({'success': True, 'deleted': count})
 
 
+@app.route('/api/events')
+@require_auth
+@leader_only
+def api_events():
+    """Server-Sent Events stream of task and run changes"""
+    subscription = task_manager.events.subscribe()
+
+    def stream():
+        try:
+            yield f"retry: 3000\nevent: hello\ndata: {json.dumps({'version': task_manager.version})}\n\n"
+            while True:
+                try:
+                    message = subscription.get(timeout=SSE_KEEPALIVE)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                yield (f"id: {message['version']}\n"
+                       f"event: {message['event']}\n"
+                       f"data: {json.dumps(message['data'])}\n\n")
+        finally:
+            task_manager.events.unsubscribe(subscription)
+
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
 # --------------------------------------------------
 # Bot Factory API
 # --------------------------------------------------
@@ -1954,6 +4733,7 @@ def api_delete_bot(name):
 
 @app.route('/api/tasks/<task_name>', methods=['DELETE'])
 @require_auth
+@leader_only
 def api_delete_task(task_name):
     """Delete a deployed task completely (script + task entry + runs)"""
     if not validate_bot_name(task_name):
@@ -1967,6 +4747,7 @@ def api_delete_task(task_name):
         if task_manager.scheduler.get_job(job_id):
             task_manager.scheduler.remove_job(job_id)
             deleted_items.append('scheduler')
+        task_manager.runner.cancel(task_name)
 
         # 2. Remove from tasks.yaml
         if os.path.exists(CONFIG_PATH):
@@ -1989,7 +4770,8 @@ def api_delete_task(task_name):
                 os.remove(script_path)
                 deleted_items.append('script')
 
-        # 4. Clear run history for this task
+        # 4. Clear run history and logs for this task
+        task_manager.runner.delete_logs(db.get_run_ids(task_name))
         db.clear_runs(task_name)
         deleted_items.append('runs')
 
@@ -2001,6 +4783,7 @@ def api_delete_task(task_name):
         if not deleted_items:
             return jsonify({'error': 'Task not found'}), 404
 
+        task_manager.notify('task_deleted', {'task': task_name})
         logger.info(f"Deleted task {task_name}: {', '.join(deleted_items)}")
         return jsonify({
             'status': 'ok',
@@ -2082,6 +4865,7 @@ def api_download_bot():
 
 @app.route('/api/bots/deploy', methods=['POST'])
 @require_auth
+@leader_only
 def api_deploy_bot():
     """Deploy a bot to the bots directory"""
     config = request.get_json()
@@ -2277,8 +5061,83 @@ def api_get_bot_file(filename):
 # Main Entry Point
 # ==================================================
 
+def create_app(config_path: str = CONFIG_PATH, bots_path: str = BOTS_PATH, db_path: str = DB_PATH,
+               exec_mode: str = EXEC_MODE, max_concurrent: int = MAX_CONCURRENT_RUNS,
+               scheduler: bool = True, run_broker: str = RUN_BROKER) -> Flask:
+    """Set up the database and scheduler leadership for this process
+
+    WSGI entry point for multi-process servers, e.g.
+    `gunicorn -w 4 -k gthread --threads 16 'app:create_app()'`. Each worker
+    serves HTTP; only the elected leader runs the scheduler and bots, and
+    the others forward scheduler requests to it.
+    """
+    global db, task_manager, leader
+
+    os.makedirs(bots_path, exist_ok=True)
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    os.makedirs(os.path.dirname(config_path), exist_ok=True)
+
+    db = Database(db_path)
+
+    def new_task_manager() -> TaskManager:
+        return TaskManager(config_path, bots_path, db, exec_mode=exec_mode, max_concurrent=max_concurrent,
+                           run_broker=run_broker)
+
+    if not scheduler:
+        task_manager = new_task_manager()
+        return app
+
+    def on_elected() -> str:
+        global task_manager
+        from werkzeug.serving import make_server
+
+        manager = new_task_manager()
+        manager.start()
+        atexit.register(manager.stop)
+        task_manager = manager
+
+        # Internal listener followers forward scheduler requests to
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, name='leader-api', daemon=True).start()
+        return f"127.0.0.1:{server.server_port}"
+
+    leader = LeaderElection(LEADER_LOCK or os.path.join(os.path.dirname(db_path), 'scheduler.lock'), on_elected)
+    leader.start()
+    return app
+
+
+def run_agent(bots_path: str, db_path: str, exec_mode: str = EXEC_MODE,
+              concurrency: int = MAX_CONCURRENT_RUNS):
+    """Worker agent: execute runs from the shared database's run queue until interrupted"""
+    agent_db = Database(db_path)
+    runner = TaskRunner(agent_db, bots_path, exec_mode=exec_mode)
+    agent = WorkerAgent(DatabaseBroker(agent_db), runner, concurrency)
+    agent.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logger.info("Stopping worker agent, waiting for running bots")
+        agent.stop()
+        runner.close()
+        agent_db.close()
+
+
 def main():
-    global db, task_manager, STATIC_PATH
+    global STATIC_PATH
+
+    # Job store references resolve `app` to this module, also when run as __main__
+    sys.modules.setdefault('app', sys.modules[__name__])
+
+    def on_sigterm(signum, frame):
+        # docker stop sends SIGTERM, which would skip the atexit handlers
+        if task_manager:
+            task_manager.stop()
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, on_sigterm)
 
     import argparse
     parser = argparse.ArgumentParser(description='Bot Factory + Task Manager')
@@ -2289,26 +5148,44 @@ def main():
     parser.add_argument('--host', default=HOST, help='Server host')
     parser.add_argument('--port', type=int, default=PORT, help='Server port')
     parser.add_argument('--no-scheduler', action='store_true', help='Disable task scheduler')
+    parser.add_argument('--exec-mode', choices=['popen', 'warm'], default=EXEC_MODE,
+                        help='Run bots in a new interpreter (popen) or fork them from a warm pool')
+    parser.add_argument('--max-concurrent', type=int, default=MAX_CONCURRENT_RUNS,
+                        help='Maximum number of bots running at the same time')
+    parser.add_argument('--broker', choices=['', 'database', 'local'], default=RUN_BROKER,
+                        help='Hand runs to worker agents through this broker instead of running them here')
+    parser.add_argument('--agent', action='store_true',
+                        help='Run as a worker agent executing runs from the database broker')
+    parser.add_argument('--prune', action='store_true',
+                        help='Apply the run history retention policy once and exit')
+    parser.add_argument('--rebuild-stats', action='store_true',
+                        help='Recompute run statistics from the run history (keeping pruned runs) and exit')
     args = parser.parse_args()
 
+    if args.rebuild_stats:
+        stats = Database(args.db).rebuild_stats()
+        logger.info(f"Run statistics rebuilt: {stats}")
+        return
+
+    if args.prune:
+        prune_db = Database(args.db)
+        runner = TaskRunner(prune_db, args.bots)
+        deleted = RunPruner(prune_db, runner).prune()
+        runner.close()
+        logger.info(f"Run history pruned: {deleted} runs deleted")
+        return
+
+    if args.agent:
+        run_agent(args.bots, args.db, exec_mode=args.exec_mode, concurrency=args.max_concurrent)
+        return
+
     # Update STATIC_PATH from args (convert to absolute path)
     STATIC_PATH = os.path.abspath(args.static)
     app.static_folder = STATIC_PATH
     logger.info(f"Static files path: {STATIC_PATH}")
 
-    # Create directories
-    os.makedirs(args.bots, exist_ok=True)
-    os.makedirs(os.path.dirname(args.db), exist_ok=True)
-    os.makedirs(os.path.dirname(args.config), exist_ok=True)
-
-    # Initialize database
-    db = Database(args.db)
-
-    # Initialize task manager
-    task_manager = TaskManager(args.config, args.bots, db)
-
-    if not args.no_scheduler:
-        task_manager.start()
+    create_app(args.config, args.bots, args.db, exec_mode=args.exec_mode,
+               max_concurrent=args.max_concurrent, scheduler=not args.no_scheduler, run_broker=args.broker)
 
     try:
         logger.info(f"Bot Factory running at http://{args.host}:{args.port}")
@@ -2316,8 +5193,9 @@ def main():
     except KeyboardInterrupt:
         pass
     finally:
-        if not args.no_scheduler:
-            task_manager.stop()
+        if leader:
+            leader.stop()
+        db.close()
 
 
 if __name__ == '__main__':
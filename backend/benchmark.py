@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Bot Factory - Micro-benchmarks
+Compares hot paths of the task manager against their previous implementations.
+
+Usage:
+    python benchmark.py db [--iterations N]
+    python benchmark.py status [--iterations N] [--tasks 10 100 1000]
+    python benchmark.py exec [--iterations N]
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import tempfile
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import Database, TaskConfig, TaskManager, TaskRunner  # noqa: E402
+
+
+# ==================================================
+# Helpers
+# ==================================================
+
+def timed(label: str, iterations: int, func):
+    """Run func `iterations` times and print per-call latency"""
+    start = time.perf_counter()
+    for i in range(iterations):
+        func(i)
+    elapsed = time.perf_counter() - start
+    per_call = elapsed / iterations * 1e6
+    print(f"  {label:<32} {elapsed:8.3f}s total  {per_call:10.1f} us/op")
+    return elapsed
+
+
+class ConnectPerCallDatabase(Database):
+    """The original connection handling: a new connection per call, rollback journal"""
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _get_conn(self):
+        conn = self._connect()
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def legacy_get_status(manager: TaskManager) -> dict:
+    """The original TaskManager.get_status: one state query and lock per task"""
+    tasks_status = []
+    for task in manager.tasks.values():
+        state = manager.db.get_task_state(task.name) or {}
+        job = manager.scheduler.get_job(f"task_{task.name}")
+        tasks_status.append({
+            'name': task.name,
+            'enabled': state.get('enabled', task.enabled),
+            'running': manager.runner.is_running(task.name),
+            'last_run': state.get('last_run'),
+            'next_run': job.next_run_time.isoformat() if job and job.next_run_time else None
+        })
+    return {'tasks': tasks_status, 'stats': manager.db.get_stats()}
+
+
+# ==================================================
+# Benchmarks
+# ==================================================
+
+def bench_db(args):
+    """Scheduled-run writes and status reads: connect-per-call vs pooled WAL"""
+    print(f"Database: {args.iterations} iterations")
+
+    results = {}
+    for label, cls in (('connect-per-call', ConnectPerCallDatabase), ('pooled', Database)):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = cls(os.path.join(tmp, 'bench.db'))
+            print(f"[{label}]")
+
+            def write_run(i):
+                run_id = db.log_run_start(f'task-{i % 10}')
+                db.log_run_end(run_id, 'success', 0, 'output', '', 0.1)
+                db.update_task_state(f'task-{i % 10}', 'success')
+
+            def read_status(i):
+                db.get_task_state(f'task-{i % 10}')
+                db.get_stats()
+
+            results[label] = (
+                timed('insert (start/end/state)', args.iterations, write_run),
+                timed('status read', args.iterations, read_status),
+            )
+            if hasattr(db, 'close'):
+                db.close()
+
+    base, pooled = results['connect-per-call'], results['pooled']
+    print(f"Speedup: inserts {base[0] / pooled[0]:.1f}x, status reads {base[1] / pooled[1]:.1f}x")
+
+
+def bench_status(args):
+    """TaskManager.get_status latency: per-task queries vs bulk snapshot"""
+    for count in args.tasks:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, 'bench.db'))
+            manager = TaskManager(os.path.join(tmp, 'missing.yaml'), tmp, db)
+            for i in range(count):
+                task = TaskConfig(name=f'task-{i}', script=f'task-{i}.py', interval=3600)
+                manager.tasks[task.name] = task
+                db.update_task_state(task.name, 'success')
+            manager._schedule_tasks()
+            manager.scheduler.start(paused=True)
+
+            print(f"[{count} tasks, {args.iterations} iterations]")
+            legacy = timed('per-task queries', args.iterations,
+                           lambda i: legacy_get_status(manager))
+            bulk = timed('bulk snapshot', args.iterations,
+                         lambda i: manager.get_status())
+            print(f"  Speedup: {legacy / bulk:.1f}x")
+
+            manager.scheduler.shutdown(wait=False)
+            db.close()
+
+
+BENCH_BOT = '''\
+import requests, bs4, feedparser
+print('ok')
+'''
+
+
+def bench_exec(args):
+    """Per-run overhead of a trivial bot: new interpreter vs warm pool"""
+    print(f"Execution: {args.iterations} runs per mode")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, 'bench_bot.py'), 'w') as f:
+            f.write(BENCH_BOT)
+        db = Database(os.path.join(tmp, 'bench.db'))
+        task = TaskConfig(name='bench', script='bench_bot.py')
+
+        for mode in ('popen', 'warm'):
+            runner = TaskRunner(db, tmp, exec_mode=mode)
+            runner.run_task(task)  # Start the pool outside the measurement
+            print(f"[{mode}]")
+            results[mode] = timed('run_task', args.iterations, lambda i: runner.run_task(task))
+            runner.close()
+        db.close()
+
+    print(f"Speedup: {results['popen'] / results['warm']:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bot Factory micro-benchmarks')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_db = sub.add_parser('db', help=bench_db.__doc__)
+    p_db.add_argument('--iterations', type=int, default=500)
+    p_db.set_defaults(func=bench_db)
+
+    p_status = sub.add_parser('status', help=bench_status.__doc__)
+    p_status.add_argument('--iterations', type=int, default=50)
+    p_status.add_argument('--tasks', type=int, nargs='+', default=[10, 100, 1000])
+    p_status.set_defaults(func=bench_status)
+
+    p_exec = sub.add_parser('exec', help=bench_exec.__doc__)
+    p_exec.add_argument('--iterations', type=int, default=20)
+    p_exec.set_defaults(func=bench_exec)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
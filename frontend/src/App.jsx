@@ -628,7 +628,16 @@ const Toggle = ({ label, checked, onChange, description }) => {
   );
 };
 
-const StatusBadge = ({ status, running }) => {
+const StatusBadge = ({ status, running, queued, position }) => {
+  if (queued && !running) {
+    return (
+      <span className="inline-flex items-center gap-1.5 px-2.5 py-1 rounded-full text-xs font-medium bg-yellow-100 text-yellow-700 dark:bg-yellow-900/50 dark:text-yellow-300">
+        <span className="w-1.5 h-1.5 bg-yellow-500 rounded-full" />
+        Queued{position ? ` #${position}` : ''}
+      </span>
+    );
+  }
+
   if (running) {
     return (
       <span className="inline-flex items-center gap-1.5 px-2.5 py-1 rounded-full text-xs font-medium bg-blue-100 text-blue-700 dark:bg-blue-900/50 dark:text-blue-300">
@@ -641,6 +650,7 @@ const StatusBadge = ({ status, running }) => {
   const styles = {
     success: 'bg-green-100 text-green-700 dark:bg-green-900/50 dark:text-green-300',
     error: 'bg-red-100 text-red-700 dark:bg-red-900/50 dark:text-red-300',
+    limit_exceeded: 'bg-orange-100 text-orange-700 dark:bg-orange-900/50 dark:text-orange-300',
     idle: 'bg-gray-100 text-gray-600 dark:bg-gray-700 dark:text-gray-300'
   };
 
@@ -648,8 +658,8 @@ const StatusBadge = ({ status, running }) => {
 
   return (
     <span className={`inline-flex items-center gap-1.5 px-2.5 py-1 rounded-full text-xs font-medium ${styles[s] || styles.idle}`}>
-      <span className={`w-1.5 h-1.5 rounded-full ${s === 'success' ? 'bg-green-500' : s === 'error' ? 'bg-red-500' : 'bg-gray-400'}`} />
-      {s === 'success' ? 'Success' : s === 'error' ? 'Error' : 'Ready'}
+      <span className={`w-1.5 h-1.5 rounded-full ${s === 'success' ? 'bg-green-500' : s === 'error' ? 'bg-red-500' : s === 'limit_exceeded' ? 'bg-orange-500' : 'bg-gray-400'}`} />
+      {s === 'success' ? 'Success' : s === 'error' ? 'Error' : s === 'limit_exceeded' ? 'Limit exceeded' : 'Ready'}
     </span>
   );
 };
@@ -664,6 +674,7 @@ function TaskManager() {
   const [stats, setStats] = useState({});
   const [runs, setRuns] = useState([]);
   const [selectedRun, setSelectedRun] = useState(null);
+  const [liveOutput, setLiveOutput] = useState(null);
   const [loading, setLoading] = useState(true);
 
   const fetchStatus = async () => {
@@ -689,11 +700,32 @@ function TaskManager() {
 
   useEffect(() => {
     Promise.all([fetchStatus(), fetchRuns()]).then(() => setLoading(false));
+
+    // Live updates: refetch on server events, coalescing bursts
+    let pending = null;
+    const refresh = () => {
+      if (pending) return;
+      pending = setTimeout(() => {
+        pending = null;
+        fetchStatus();
+        fetchRuns();
+      }, 250);
+    };
+    const events = new EventSource('/api/events');
+    ['hello', 'task_queued', 'task_dequeued', 'task_started', 'task_finished', 'task_enabled', 'config_reloaded', 'task_deleted',
+     'run_deleted', 'runs_cleared', 'job_skipped', 'resync'].forEach(name => events.addEventListener(name, refresh));
+
+    // Fall back to polling while the event stream is disconnected
     const interval = setInterval(() => {
+      if (events.readyState === EventSource.OPEN) return;
       fetchStatus();
       fetchRuns();
     }, 10000);
-    return () => clearInterval(interval);
+    return () => {
+      events.close();
+      clearInterval(interval);
+      clearTimeout(pending);
+    };
   }, []);
 
   const runTask = async (taskName) => {
@@ -734,9 +766,26 @@ function TaskManager() {
 
   const viewRunDetail = async (runId) => {
     const res = await fetch(`/api/runs/${runId}`);
-    setSelectedRun(await res.json());
+    const run = await res.json();
+    setSelectedRun(run);
+    setLiveOutput(['running', 'queued'].includes(run.status) ? '' : null);
   };
 
+  // Tail the output of a running run until it ends
+  useEffect(() => {
+    if (!selectedRun || !['running', 'queued'].includes(selectedRun.status)) return;
+    const stream = new EventSource(`/api/runs/${selectedRun.id}/stream`);
+    stream.addEventListener('output', (e) => setLiveOutput(prev => (prev || '') + JSON.parse(e.data)));
+    stream.addEventListener('end', () => {
+      stream.close();
+      fetch(`/api/runs/${selectedRun.id}`).then(res => res.json()).then(run => {
+        setSelectedRun(run);
+        setLiveOutput(null);
+      });
+    });
+    return () => stream.close();
+  }, [selectedRun?.id, selectedRun?.status]);
+
   const deleteRun = async (runId) => {
     if (!confirm('Are you sure you want to delete this run?')) return;
     await fetch(`/api/runs/${runId}`, { method: 'DELETE' });
@@ -819,15 +868,15 @@ function TaskManager() {
               </div>
 
               <div className="flex justify-between items-center">
-                <StatusBadge status={task.last_status} running={task.running} />
+                <StatusBadge status={task.last_status} running={task.running} queued={task.queued} position={task.queue_position} />
                 <div className="flex gap-2">
                   <button
                     onClick={() => runTask(task.name)}
-                    disabled={task.running}
+                    disabled={task.running || task.queued}
                     className="flex items-center gap-1 px-3 py-1.5 bg-green-500 text-white text-sm rounded-lg hover:bg-green-600 disabled:opacity-50"
                   >
                     <Play size={14} />
-                    {task.running ? 'Running...' : 'Run Now'}
+                    {task.running ? 'Running...' : task.queued ? 'Queued' : 'Run Now'}
                   </button>
                   <button
                     onClick={() => deleteTask(task.name)}
@@ -867,7 +916,7 @@ function TaskManager() {
                 <tr key={run.id} className={dark ? 'hover:bg-gray-700/50' : 'hover:bg-gray-50'}>
                   <td className={`px-4 py-3 font-medium ${dark ? 'text-white' : ''}`}>{run.task_name}</td>
                   <td className="px-4 py-3">
-                    <StatusBadge status={run.status} running={run.status === 'running'} />
+                    <StatusBadge status={run.status} running={run.status === 'running'} queued={run.status === 'queued'} />
                   </td>
                   <td className={`px-4 py-3 ${dark ? 'text-gray-400' : 'text-gray-500'}`}>{formatDate(run.started_at)}</td>
                   <td className={`px-4 py-3 font-mono ${dark ? 'text-gray-400' : 'text-gray-500'}`}>
@@ -897,11 +946,11 @@ function TaskManager() {
 
       {/* Run Detail Modal */}
       {selectedRun && (
-        <div className="fixed inset-0 bg-black/50 flex items-center justify-center z-50" onClick={() => setSelectedRun(null)}>
+        <div className="fixed inset-0 bg-black/50 flex items-center justify-center z-50" onClick={() => { setSelectedRun(null); setLiveOutput(null); }}>
           <div className={`rounded-xl max-w-2xl w-full mx-4 max-h-[80vh] overflow-hidden ${dark ? 'bg-gray-800' : 'bg-white'}`} onClick={e => e.stopPropagation()}>
             <div className={`flex justify-between items-center px-6 py-4 border-b ${dark ? 'border-gray-700' : ''}`}>
               <h3 className={`font-semibold ${dark ? 'text-white' : ''}`}>Run #{selectedRun.id}: {selectedRun.task_name}</h3>
-              <button onClick={() => setSelectedRun(null)} className={`text-2xl ${dark ? 'text-gray-400 hover:text-gray-200' : 'text-gray-400 hover:text-gray-600'}`}>&times;</button>
+              <button onClick={() => { setSelectedRun(null); setLiveOutput(null); }} className={`text-2xl ${dark ? 'text-gray-400 hover:text-gray-200' : 'text-gray-400 hover:text-gray-600'}`}>&times;</button>
             </div>
             <div className="p-6 overflow-y-auto max-h-[60vh]">
               <div className={`grid grid-cols-2 gap-4 mb-4 text-sm ${dark ? 'text-gray-300' : ''}`}>
@@ -909,8 +958,23 @@ function TaskManager() {
                 <div><strong>Exit Code:</strong> {selectedRun.exit_code ?? '-'}</div>
                 <div><strong>Started:</strong> {formatDate(selectedRun.started_at)}</div>
                 <div><strong>Duration:</strong> {selectedRun.duration_seconds?.toFixed(2)}s</div>
+                {selectedRun.cpu_user_seconds != null && (
+                  <>
+                    <div><strong>CPU:</strong> {selectedRun.cpu_user_seconds.toFixed(2)}s user, {selectedRun.cpu_system_seconds.toFixed(2)}s sys</div>
+                    <div><strong>Max RSS:</strong> {(selectedRun.max_rss_kb / 1024).toFixed(1)} MB</div>
+                  </>
+                )}
               </div>
 
+              {liveOutput !== null && (
+                <div className="mb-4">
+                  <h4 className={`text-sm font-medium mb-2 ${dark ? 'text-gray-400' : 'text-gray-500'}`}>Live Output</h4>
+                  <pre className="bg-gray-900 text-green-400 p-4 rounded-lg text-xs overflow-x-auto max-h-48">
+                    {liveOutput || 'Waiting for output...'}
+                  </pre>
+                </div>
+              )}
+
               {selectedRun.output && (
                 <div className="mb-4">
                   <h4 className={`text-sm font-medium mb-2 ${dark ? 'text-gray-400' : 'text-gray-500'}`}>Output</h4>
@@ -980,6 +1044,7 @@ function BotFactory({ onDeploy }) {
       healthCheck: { enabled: true },
       dashboard: { enabled: true, port: 8080 },
       retry: { enabled: true, maxRetries: 3 },
+      concurrency: { workers: 8, perHost: 4 },
       structuredLogging: true,
       logLevel: 'INFO',
       dryRun: false
@@ -1007,6 +1072,10 @@ function BotFactory({ onDeploy }) {
       processing: {
         ...template.config.processing,
         aiApiKey: prev.processing.aiApiKey
+      },
+      professional: {
+        ...template.config.professional,
+        concurrency: prev.professional.concurrency
       }
     }));
   };
@@ -1472,6 +1541,29 @@ function BotFactory({ onDeploy }) {
                 <option value="ERROR">ERROR</option>
               </select>
             </div>
+
+            <div className="grid grid-cols-2 gap-4 mt-4">
+              <div>
+                <label className={`block text-sm font-medium mb-2 ${dark ? 'text-gray-300' : ''}`}>Parallel Requests</label>
+                <input
+                  type="number"
+                  value={config.professional.concurrency.workers}
+                  onChange={(e) => updateConfig('professional.concurrency.workers', Math.max(1, parseInt(e.target.value) || 8))}
+                  className={`w-full px-3 py-2 border rounded-lg ${dark ? 'bg-gray-700 border-gray-600 text-white' : ''}`}
+                  min="1"
+                />
+              </div>
+              <div>
+                <label className={`block text-sm font-medium mb-2 ${dark ? 'text-gray-300' : ''}`}>Parallel Requests per Host</label>
+                <input
+                  type="number"
+                  value={config.professional.concurrency.perHost}
+                  onChange={(e) => updateConfig('professional.concurrency.perHost', Math.max(1, parseInt(e.target.value) || 4))}
+                  className={`w-full px-3 py-2 border rounded-lg ${dark ? 'bg-gray-700 border-gray-600 text-white' : ''}`}
+                  min="1"
+                />
+              </div>
+            </div>
           </div>
         );
 